@@ -2,37 +2,451 @@
 Flask application for Local AI RAG Chatbot.
 Main application file with routes and handlers.
 """
-from flask import Flask, render_template, request, jsonify, send_file, session
+from flask import (
+    Flask, Response, render_template, request, jsonify, send_from_directory,
+    session, stream_with_context
+)
 import os
+import re
+import atexit
+import contextvars
+import hashlib
+import threading
+import time
+import uuid
+import msgspec
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+from flask_compress import Compress
+from apscheduler.schedulers.background import BackgroundScheduler
+from werkzeug.exceptions import BadRequest, NotFound
 from werkzeug.utils import secure_filename
 from datetime import datetime
-from config import Config
+from config import Config, SESSION_OVERRIDES
 from logger import logger
 from rag_engine import RAGEngine
-from gemini_client import GeminiClient
-from github_client import GitHubClient
-from word_generator import (
-    create_process_document,
-    list_generated_reports,
-    cleanup_old_reports
-)
+from gemini_client import GeminiClient, ResponseBatcher, ERROR_RESPONSE_PREFIX
+from github_client import GitHubClient, MAX_RESULTS_LIMIT
+from chat_cache import ChatCache
+from json_provider import OrjsonProvider
+from reports_index import ReportsIndex
+from word_generator import create_process_document, cleanup_old_reports
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = OrjsonProvider(app)
+
+# Compress JSON and HTML responses (SSE streams are left untouched so
+# deltas aren't held back in the compressor's buffer)
+app.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/html']
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_MIN_SIZE'] = 1024
+Compress(app)
+
+# Shared pool for blocking RAG and GitHub calls (I/O releases the GIL)
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='chat-io')
+
+# Maximum queries accepted by /api/chat/batch
+MAX_BATCH_QUERIES = 32
+
+def _native_thread_executor(max_workers, thread_name_prefix):
+    """
+    Create an executor whose workers are real OS threads.
+    
+    Under gunicorn's gevent worker, threading is monkey-patched and a
+    stdlib ThreadPoolExecutor runs tasks as greenlets, so CPU-bound work
+    (python-docx rendering) would stall every request on the worker.
+    gevent's own ThreadPoolExecutor always uses native threads.
+    """
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            from gevent.threadpool import ThreadPoolExecutor as NativeExecutor
+            return NativeExecutor(max_workers=max_workers)
+    except ImportError:
+        pass
+    return ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix=thread_name_prefix
+    )
+
+
+# Bounded pool for Word report generation; jobs are polled by id.
+# job_id -> (future, submitted_at), oldest first; finished jobs are pruned
+# after REPORT_JOB_TTL and the map never holds more than MAX_REPORT_JOBS.
+REPORT_JOB_TTL = 3600  # Seconds
+MAX_REPORT_JOBS = 1000
+_report_pool = _native_thread_executor(4, 'report')
+_report_jobs = OrderedDict()
+_report_jobs_lock = threading.Lock()
+
+# GitHub data for chat prompts (repo info, open PRs and issues), reused
+# per repository so consecutive chat turns don't refetch it
+GITHUB_CONTEXT_TTL = 60  # Seconds
+_github_context_cache = TTLCache(maxsize=8, ttl=GITHUB_CONTEXT_TTL)
+_github_context_lock = threading.Lock()
+
+# Serialized /api/prompts/templates body and its content-hash ETag, rebuilt
+# when Config.PROMPT_VERSION changes: (version, etag, body)
+_prompt_templates_snapshot = (None, None, None)
+
+# Names create_process_document (and workflow artifacts) produce; anything
+# else is rejected rather than rewritten
+_SAFE_REPORT_NAME = re.compile(r'[\w.-]{1,250}\.docx')
 
 # Initialize components
 try:
     Config.validate()
+    # GitHub authentication and repository lookup are network round trips;
+    # overlap them with opening ChromaDB
+    github_future = _pool.submit(GitHubClient)
     rag_engine = RAGEngine()
     gemini_client = GeminiClient()
-    github_client = GitHubClient()
+    if Config.GEMINI_WARMUP:
+        _pool.submit(gemini_client.warm_up)
+    response_batcher = (
+        ResponseBatcher(
+            gemini_client,
+            max_wait=Config.CHAT_BATCH_WINDOW_MS / 1000,
+            max_batch=MAX_BATCH_QUERIES
+        )
+        if Config.CHAT_BATCH_WINDOW_MS > 0 else None
+    )
+    github_client = github_future.result()
+    chat_cache = ChatCache()
+    retrieval_cache = ChatCache(
+        max_entries=Config.RETRIEVAL_CACHE_MAX_ENTRIES,
+        ttl_seconds=Config.RETRIEVAL_CACHE_TTL,
+        name='Retrieval'
+    )
+    reports_index = ReportsIndex()
+    logger.info(f"Indexed {reports_index.scan()} generated report(s)")
     logger.info("Application initialized successfully")
 except Exception as e:
     logger.error(f"Failed to initialize application: {e}")
     raise
 
 
+@app.before_request
+def bind_session_overrides():
+    """Expose the session's document settings to this request's context."""
+    Config.set_session_overrides(session)
+
+
+def _collect_github_data(f_info, f_pr, f_iss, timeout=10):
+    """
+    Wait for concurrently submitted GitHub calls and assemble their results.
+
+    A call that fails or times out degrades to an empty value instead of
+    failing the whole chat request. The timeout is one deadline shared by
+    all three calls, so the total wait never exceeds it.
+    """
+    deadline = time.monotonic() + timeout
+    github_data = {}
+    for key, future, fallback in (
+        ('repository_info', f_info, None),
+        ('pull_requests', f_pr, []),
+        ('issues', f_iss, []),
+    ):
+        try:
+            remaining = max(0.0, deadline - time.monotonic())
+            github_data[key] = future.result(timeout=remaining)
+        except Exception as e:
+            logger.warning(f"GitHub fetch for {key} failed: {e}")
+            github_data[key] = fallback
+    return github_data
+
+
+def _fetch_github_data():
+    """
+    Fetch GitHub data for a chat prompt, concurrently and at most once per
+    GITHUB_CONTEXT_TTL for the connected repository.
+
+    Returns:
+        Dictionary of GitHub data, or None if no repository is connected
+    """
+    if not github_client.is_connected():
+        return None
+
+    key = github_client.repo_url
+    with _github_context_lock:
+        github_data = _github_context_cache.get(key)
+    if github_data is not None:
+        return github_data
+
+    github_data = _collect_github_data(
+        _pool.submit(github_client.get_repository_info),
+        _pool.submit(github_client.get_pull_requests, state='open', limit=5),
+        _pool.submit(github_client.get_issues, state='open', limit=5)
+    )
+    # Missing repository info means the fetch failed; don't pin that
+    if github_data['repository_info'] is not None:
+        with _github_context_lock:
+            _github_context_cache[key] = github_data
+    return github_data
+
+
+def _embed_query(user_query):
+    """Embed a chat query for the response cache, or None on failure."""
+    try:
+        return rag_engine.embed_query(user_query)
+    except Exception as e:
+        logger.warning(f"Query embedding failed, skipping cache: {e}")
+        return None
+
+
+def _retrieve_context(user_query, query_embedding=None):
+    """
+    Retrieve RAG context, reusing chunks cached for the same or a
+    near-duplicate query.
+    """
+    rag_context = retrieval_cache.get(user_query, query_embedding)
+    if rag_context is None:
+        corpus_version = rag_engine.corpus_version
+        rag_context = rag_engine.retrieve_context(
+            user_query,
+            query_embedding=query_embedding
+        )
+        _cache_retrieval(user_query, rag_context, query_embedding, corpus_version)
+    return rag_context
+
+
+def _cache_retrieval(user_query, rag_context, query_embedding, corpus_version):
+    """Cache retrieved chunks unless empty or the corpus changed meanwhile."""
+    # Empty results may be a transient error; don't pin them
+    if rag_context and corpus_version == rag_engine.corpus_version:
+        retrieval_cache.put(user_query, rag_context, query_embedding)
+
+
+def _chunk_ids(rag_context):
+    """Identify retrieved chunks by source file and chunk index."""
+    return frozenset((chunk.filename, chunk.chunk_index) for chunk in rag_context)
+
+
+def _cached_chat_response(user_query, query_embedding):
+    """
+    Look up a cached chat response.
+
+    Near-duplicate (semantic) hits are only served when the document
+    corpus is unchanged since the cached answer was built and the new query
+    retrieves mostly the same chunks it was built from, so a paraphrase that
+    lands on different documents gets a fresh answer.
+    """
+    def grounded(grounding):
+        corpus_version, cached_ids = grounding
+        if corpus_version != rag_engine.corpus_version:
+            return False
+        # Search directly: the retrieval cache's own semantic tier would
+        # just hand back the cached query's chunks
+        rag_context = rag_engine.retrieve_context(
+            user_query,
+            query_embedding=query_embedding
+        )
+        _cache_retrieval(user_query, rag_context, query_embedding, corpus_version)
+        current = _chunk_ids(rag_context)
+        union = current | cached_ids
+        if not union:
+            return True
+        overlap = len(current & cached_ids) / len(union)
+        return overlap >= Config.CHAT_CACHE_GROUNDING
+
+    return chat_cache.get(user_query, query_embedding, accept=grounded)
+
+
+def _cache_chat_response(user_query, payload, query_embedding, rag_context,
+                         corpus_version):
+    """
+    Cache a chat response along with the corpus version and chunks it was
+    grounded on.
+
+    Skipped if documents were uploaded or cleared while the answer was being
+    generated: the caches were emptied then, and the answer is already stale.
+    """
+    if corpus_version != rag_engine.corpus_version:
+        return
+    chat_cache.put(
+        user_query, payload, query_embedding,
+        grounding=(corpus_version, _chunk_ids(rag_context))
+    )
+
+
+def _retrieve_context_batch(queries, query_embeddings):
+    """
+    Retrieve RAG context for several queries, searching ChromaDB once for
+    the ones missing from the retrieval cache.
+    """
+    contexts = [
+        retrieval_cache.get(q, emb) for q, emb in zip(queries, query_embeddings)
+    ]
+    missing = [i for i, context in enumerate(contexts) if context is None]
+    if missing:
+        missing_embeddings = [query_embeddings[i] for i in missing]
+        corpus_version = rag_engine.corpus_version
+        fetched = rag_engine.retrieve_context_batch(
+            [queries[i] for i in missing],
+            query_embeddings=(
+                None if None in missing_embeddings else missing_embeddings
+            )
+        )
+        for i, rag_context in zip(missing, fetched):
+            contexts[i] = rag_context
+            _cache_retrieval(
+                queries[i], rag_context, query_embeddings[i], corpus_version
+            )
+    return contexts
+
+
+def _gather_context(user_query, query_embedding=None):
+    """
+    Retrieve RAG context and GitHub data for a chat query in parallel.
+
+    Returns:
+        Tuple of (rag_context, github_data)
+    """
+    rag_future = _pool.submit(_retrieve_context, user_query, query_embedding)
+    github_data = _fetch_github_data()
+    return rag_future.result(), github_data
+
+
+def _prune_report_jobs():
+    """Drop expired finished jobs and cap the job map (lock must be held)."""
+    now = time.time()
+    for job_id, (future, submitted_at) in list(_report_jobs.items()):
+        if future.done() and now - submitted_at >= REPORT_JOB_TTL:
+            del _report_jobs[job_id]
+    while len(_report_jobs) > MAX_REPORT_JOBS:
+        _report_jobs.popitem(last=False)
+
+
+def _build_report(*args, **kwargs):
+    """Generate a Word report in the report pool and index it."""
+    filename = create_process_document(*args, **kwargs)
+    logger.info(f"Generated Word report: {filename}")
+    reports_index.add(filename)
+    return filename
+
+
+def _scheduled_report_cleanup():
+    """Delete expired reports on a schedule, off the request path."""
+    try:
+        deleted_count = cleanup_old_reports(Config.REPORT_RETENTION_HOURS)
+        reports_index.scan()
+        logger.info(f"Scheduled cleanup deleted {deleted_count} old report(s)")
+    except Exception as e:
+        logger.error(f"Error in scheduled report cleanup: {e}")
+
+
+def _parse_limit(default=10, cap=MAX_RESULTS_LIMIT):
+    """
+    Parse the limit query parameter, clamped to [1, cap].
+    
+    Args:
+        default: Value used when limit is absent
+        cap: Maximum allowed value
+        
+    Returns:
+        Clamped limit
+        
+    Raises:
+        BadRequest: If the value isn't an integer
+    """
+    try:
+        limit = int(request.args.get('limit', default))
+    except ValueError:
+        raise BadRequest('limit must be an integer')
+    return min(max(1, limit), cap)
+
+
+def _not_modified(etag):
+    """
+    Build a 304 response if the client already holds the given ETag.
+    
+    Args:
+        etag: Current ETag of the resource
+        
+    Returns:
+        304 response, or None if the client's copy is stale
+    """
+    # Flask-Compress suffixes ETags with the content encoding
+    candidates = [etag] + [f'{etag}:{enc}' for enc in ('gzip', 'br', 'deflate')]
+    if any(request.if_none_match.contains_weak(tag) for tag in candidates):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def _sse(data, event=None):
+    """Format a Server-Sent Events frame."""
+    frame = f"data: {app.json.dumps(data)}\n\n"
+    if event:
+        frame = f"event: {event}\n{frame}"
+    return frame
+
+
+def _chat_event_stream(user_query, use_cache=True):
+    """Build the SSE response that streams a chat answer for user_query."""
+    def generate():
+        if not user_query:
+            yield _sse({'error': 'Query cannot be empty'}, event='error')
+            return
+
+        try:
+            logger.info(f"Streaming chat query: {user_query[:100]}...")
+
+            query_embedding = _embed_query(user_query)
+            cached = (
+                _cached_chat_response(user_query, query_embedding)
+                if use_cache else None
+            )
+            if cached:
+                logger.info("Serving chat response from cache")
+                yield _sse({'delta': cached['response']})
+                yield _sse(cached, event='done')
+                return
+
+            corpus_version = rag_engine.corpus_version
+            rag_context, github_data = _gather_context(
+                user_query, query_embedding
+            )
+
+            parts = []
+            for chunk in gemini_client.generate_response_stream(
+                user_query,
+                rag_context=rag_context,
+                github_data=github_data
+            ):
+                parts.append(chunk)
+                yield _sse({'delta': chunk})
+
+            response = ''.join(parts)
+            payload = {
+                'response': response,
+                'rag_chunks_used': len(rag_context),
+                'github_data_available': github_data is not None
+            }
+            if parts and not parts[-1].startswith(ERROR_RESPONSE_PREFIX):
+                _cache_chat_response(
+                    user_query, payload, query_embedding, rag_context,
+                    corpus_version
+                )
+
+            yield _sse(payload, event='done')
+
+        except Exception as e:
+            logger.error(f"Error streaming chat response: {e}")
+            yield _sse({'error': str(e)}, event='error')
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/')
 def index():
     """Render main chat interface."""
@@ -62,48 +476,161 @@ def chat():
     """
     Handle chat requests.
     Combines RAG context and GitHub data to generate responses.
+
+    Clients that send ``Accept: text/event-stream`` get the answer streamed
+    as in /api/chat/stream instead of one buffered JSON body. Sending
+    ``"cache": false`` skips the response cache lookup.
     """
     try:
         data = request.get_json()
         user_query = data.get('query', '').strip()
+        use_cache = data.get('cache', True) is not False
         
         if not user_query:
             return jsonify({'error': 'Query cannot be empty'}), 400
+
+        if request.accept_mimetypes.best_match(
+            ['application/json', 'text/event-stream']
+        ) == 'text/event-stream':
+            return _chat_event_stream(user_query, use_cache)
         
         logger.info(f"Processing chat query: {user_query[:100]}...")
+
+        # Serve repeat and near-duplicate queries from the cache
+        query_embedding = _embed_query(user_query)
+        cached = (
+            _cached_chat_response(user_query, query_embedding)
+            if use_cache else None
+        )
+        if cached:
+            logger.info("Serving chat response from cache")
+            return jsonify(cached)
+
+        corpus_version = rag_engine.corpus_version
+        rag_context, github_data = _gather_context(user_query, query_embedding)
         
-        # Retrieve RAG context
-        rag_context = rag_engine.retrieve_context(user_query)
-        
-        # Gather GitHub data if connected
-        github_data = None
-        if github_client.is_connected():
-            github_data = {
-                'repository_info': github_client.get_repository_info(),
-                'pull_requests': github_client.get_pull_requests(
-                    state='open', limit=5
-                ),
-                'issues': github_client.get_issues(state='open', limit=5)
-            }
-        
-        # Generate response
-        response = gemini_client.generate_response(
+        # Generate response (coalesced with concurrent queries if enabled)
+        generator = response_batcher or gemini_client
+        response = generator.generate_response(
             user_query,
             rag_context=rag_context,
             github_data=github_data
         )
         
-        return jsonify({
+        payload = {
             'response': response,
             'rag_chunks_used': len(rag_context),
             'github_data_available': github_data is not None
-        })
-        
+        }
+        if not response.startswith(ERROR_RESPONSE_PREFIX):
+            _cache_chat_response(
+                user_query, payload, query_embedding, rag_context,
+                corpus_version
+            )
+
+        return jsonify(payload)
+
     except Exception as e:
         logger.error(f"Error processing chat request: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """
+    Handle chat requests as a Server-Sent Events stream.
+
+    Takes the same JSON body as /api/chat (``query``, optional
+    ``cache: false`` to skip the response cache); POST keeps queries out of
+    URLs and access logs. Emits ``data: {"delta": ...}`` frames as Gemini
+    produces text, then a final ``done`` event carrying the response metadata.
+    """
+    data = request.get_json(silent=True) or {}
+    user_query = str(data.get('query', '')).strip()
+    use_cache = data.get('cache', True) is not False
+
+    return _chat_event_stream(user_query, use_cache)
+
+
+@app.route('/api/chat/batch', methods=['POST'])
+def chat_batch():
+    """
+    Answer several chat queries in one request.
+    
+    Request JSON:
+        - queries: List of query strings (at most MAX_BATCH_QUERIES)
+        
+    Returns:
+        JSON with a results list aligned with queries; each item has the
+        same shape as an /api/chat response
+    """
+    try:
+        data = request.get_json() or {}
+        queries = data.get('queries')
+        
+        if not isinstance(queries, list) or not queries:
+            return jsonify({'error': 'queries must be a non-empty list'}), 400
+        if len(queries) > MAX_BATCH_QUERIES:
+            return jsonify({
+                'error': f'At most {MAX_BATCH_QUERIES} queries per batch'
+            }), 400
+        if not all(isinstance(q, str) and q.strip() for q in queries):
+            return jsonify({'error': 'Queries cannot be empty'}), 400
+        
+        queries = [q.strip() for q in queries]
+        logger.info(f"Processing chat batch of {len(queries)} queries")
+        
+        # One embedding call for the whole batch
+        try:
+            embeddings = rag_engine.embed_batch(queries)
+        except Exception as e:
+            logger.warning(f"Batch embedding failed, skipping cache: {e}")
+            embeddings = [None] * len(queries)
+        
+        # Serve what we can from the cache
+        results = [
+            _cached_chat_response(q, emb) for q, emb in zip(queries, embeddings)
+        ]
+        pending = [i for i, cached in enumerate(results) if not cached]
+        
+        if pending:
+            pending_queries = [queries[i] for i in pending]
+            pending_embeddings = [embeddings[i] for i in pending]
+            
+            corpus_version = rag_engine.corpus_version
+            rag_future = _pool.submit(
+                _retrieve_context_batch, pending_queries, pending_embeddings
+            )
+            github_data = _fetch_github_data()
+            rag_contexts = rag_future.result()
+            
+            # One Gemini call for every uncached query
+            responses = gemini_client.generate_responses_batch(
+                pending_queries,
+                rag_contexts=rag_contexts,
+                github_data=github_data
+            )
+            
+            for i, rag_context, response in zip(pending, rag_contexts, responses):
+                payload = {
+                    'response': response,
+                    'rag_chunks_used': len(rag_context),
+                    'github_data_available': github_data is not None
+                }
+                if not response.startswith(ERROR_RESPONSE_PREFIX):
+                    _cache_chat_response(
+                        queries[i], payload, embeddings[i], rag_context,
+                        corpus_version
+                    )
+                results[i] = payload
+        
+        return jsonify({'results': results})
+        
+    except Exception as e:
+        logger.error(f"Error processing chat batch: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/upload', methods=['POST'])
 def upload_document():
     """Handle document uploads for RAG."""
@@ -117,23 +644,22 @@ def upload_document():
             return jsonify({'error': 'No file selected'}), 400
         
         if not Config.allowed_file(file.filename):
-            allowed = ', '.join(Config.ALLOWED_EXTENSIONS)
             return jsonify({
-                'error': f'File type not allowed. Supported: {allowed}'
+                'error': (
+                    'File type not allowed. Supported: '
+                    f'{Config.ALLOWED_EXTENSIONS_DISPLAY}'
+                )
             }), 400
         
-        # Secure filename and save
         filename = secure_filename(file.filename)
-        filepath = os.path.join(Config.UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        
         logger.info(f"File uploaded: {filename}")
         
-        # Process document
-        chunks_added = rag_engine.add_document(filepath, filename)
-        
-        # Clean up uploaded file
-        os.remove(filepath)
+        # Process document straight from the upload stream
+        chunks_added = rag_engine.add_document_stream(file.stream, filename)
+
+        # Cached answers may not reflect the new document
+        chat_cache.clear()
+        retrieval_cache.clear()
         
         return jsonify({
             'success': True,
@@ -155,7 +681,10 @@ def rag_stats():
     """Get RAG database statistics."""
     try:
         stats = rag_engine.get_stats()
-        return jsonify(stats)
+        return jsonify({
+            **stats,
+            'retrieval_cache': retrieval_cache.stats()
+        })
     except Exception as e:
         logger.error(f"Error getting RAG stats: {e}")
         return jsonify({'error': str(e)}), 500
@@ -167,6 +696,8 @@ def clear_rag():
     try:
         success = rag_engine.clear_database()
         if success:
+            chat_cache.clear()
+            retrieval_cache.clear()
             return jsonify({
                 'success': True,
                 'message': 'RAG database cleared'
@@ -191,6 +722,9 @@ def connect_github():
         success = github_client.connect_to_repo(repo_url)
         
         if success:
+            chat_cache.clear()
+            with _github_context_lock:
+                _github_context_cache.clear()
             repo_info = github_client.get_repository_info()
             return jsonify({
                 'success': True,
@@ -213,7 +747,15 @@ def github_info():
             return jsonify({'error': 'Not connected to a repository'}), 404
         
         info = github_client.get_repository_info()
-        return jsonify(info)
+        response = jsonify(info)
+        
+        etag = hashlib.md5(response.get_data()).hexdigest()
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
+        response.set_etag(etag)
+        return response
         
     except Exception as e:
         logger.error(f"Error getting GitHub info: {e}")
@@ -273,11 +815,16 @@ def get_pulls():
             return jsonify({'error': 'Not connected to a repository'}), 404
         
         state = request.args.get('state', 'open')
-        limit = int(request.args.get('limit', 10))
+        limit = _parse_limit()
         
         pulls = github_client.get_pull_requests(state, limit)
-        return jsonify({'pull_requests': pulls})
+        return Response(
+            msgspec.json.encode({'pull_requests': pulls}),
+            mimetype='application/json'
+        )
         
+    except BadRequest as e:
+        return jsonify({'error': e.description}), 400
     except Exception as e:
         logger.error(f"Error getting pull requests: {e}")
         return jsonify({'error': str(e)}), 500
@@ -291,11 +838,16 @@ def get_issues():
             return jsonify({'error': 'Not connected to a repository'}), 404
         
         state = request.args.get('state', 'open')
-        limit = int(request.args.get('limit', 10))
+        limit = _parse_limit()
         
         issues = github_client.get_issues(state, limit)
-        return jsonify({'issues': issues})
+        return Response(
+            msgspec.json.encode({'issues': issues}),
+            mimetype='application/json'
+        )
         
+    except BadRequest as e:
+        return jsonify({'error': e.description}), 400
     except Exception as e:
         logger.error(f"Error getting issues: {e}")
         return jsonify({'error': str(e)}), 500
@@ -308,23 +860,41 @@ def health():
         'status': 'healthy',
         'gemini_connected': True,  # If we got here, Gemini is configured
         'github_connected': github_client.is_connected(),
-        'rag_chunks': rag_engine.get_stats().get('total_chunks', 0)
+        'rag_chunks': rag_engine.get_stats().get('total_chunks', 0),
+        'chat_cache': chat_cache.stats()
     })
 
 
 @app.route('/api/prompts/templates', methods=['GET'])
 def get_prompt_templates():
     """Get available system prompt templates."""
+    global _prompt_templates_snapshot
     try:
-        templates = {}
-        for name in Config.get_available_prompts():
-            templates[name] = Config.SYSTEM_PROMPTS[name]
+        # The body and its ETag are rebuilt only when the prompt config
+        # changes; the ETag hashes the content, so it stays valid across
+        # restarts and workers (PROMPT_VERSION is per process)
+        version, etag, body = _prompt_templates_snapshot
+        if version != Config.PROMPT_VERSION:
+            version = Config.PROMPT_VERSION
+            templates = {}
+            for name in Config.get_available_prompts():
+                templates[name] = Config.SYSTEM_PROMPTS[name]
+            
+            body = app.json.dumps({
+                'templates': templates,
+                'current_template': Config.SYSTEM_PROMPT_TEMPLATE,
+                'current_prompt': Config.get_system_prompt()
+            })
+            etag = hashlib.md5(body.encode('utf-8')).hexdigest()
+            _prompt_templates_snapshot = (version, etag, body)
         
-        return jsonify({
-            'templates': templates,
-            'current_template': Config.SYSTEM_PROMPT_TEMPLATE,
-            'current_prompt': Config.get_system_prompt()
-        })
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+        
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        return response
     except Exception as e:
         logger.error(f"Error getting prompt templates: {e}")
         return jsonify({'error': str(e)}), 500
@@ -371,9 +941,11 @@ def update_prompt():
         else:
             return jsonify({'error': 'Invalid template or prompt'}), 400
         
-        # Re-initialize Gemini client with new prompt
-        global gemini_client
-        gemini_client = GeminiClient()
+        Config.clear_prompt_cache()
+        
+        # Swap the prompt on the existing Gemini client
+        gemini_client.set_system_prompt(Config.get_system_prompt())
+        chat_cache.clear()
         
         return jsonify({
             'success': True,
@@ -392,10 +964,11 @@ def reset_prompt():
     try:
         Config.CUSTOM_SYSTEM_PROMPT = ''
         Config.SYSTEM_PROMPT_TEMPLATE = 'default'
+        Config.clear_prompt_cache()
         
-        # Re-initialize Gemini client
-        global gemini_client
-        gemini_client = GeminiClient()
+        # Swap the prompt on the existing Gemini client
+        gemini_client.set_system_prompt(Config.get_system_prompt())
+        chat_cache.clear()
         
         logger.info("Reset system prompt to default")
         
@@ -413,17 +986,8 @@ def reset_prompt():
 def get_doc_config():
     """Get current document template configuration."""
     try:
-        # Check session first, then fall back to Config
-        config = {
-            'project_name': session.get('project_name', Config.PROJECT_NAME),
-            'company_name': session.get('company_name', Config.COMPANY_NAME),
-            'brand_color': session.get('brand_color', Config.BRAND_COLOR),
-            'default_template': session.get(
-                'default_template',
-                Config.DEFAULT_TEMPLATE_TYPE
-            ),
-            'logo_path': session.get('logo_path', Config.DOCUMENT_LOGO_PATH)
-        }
+        # Session values for this request, falling back to Config
+        config = {key: Config.effective(key) for key in SESSION_OVERRIDES}
         
         return jsonify(config)
     except Exception as e:
@@ -505,7 +1069,7 @@ def generate_word_report():
         - query: Original user query (optional)
         
     Returns:
-        JSON with filename and download URL
+        202 with job_id and status URL; poll /api/reports/status/<job_id>
     """
     try:
         data = request.get_json()
@@ -522,53 +1086,68 @@ def generate_word_report():
             'query': query
         }
         
-        # Apply session-based configuration overrides
-        original_config = {}
-        if 'project_name' in session:
-            original_config['PROJECT_NAME'] = Config.PROJECT_NAME
-            Config.PROJECT_NAME = session['project_name']
-        if 'company_name' in session:
-            original_config['COMPANY_NAME'] = Config.COMPANY_NAME
-            Config.COMPANY_NAME = session['company_name']
-        if 'brand_color' in session:
-            original_config['BRAND_COLOR'] = Config.BRAND_COLOR
-            Config.BRAND_COLOR = session['brand_color']
-        if 'logo_path' in session:
-            original_config['DOCUMENT_LOGO_PATH'] = Config.DOCUMENT_LOGO_PATH
-            Config.DOCUMENT_LOGO_PATH = session['logo_path']
-        
-        # Get template type from session or use default
-        template_type = session.get(
-            'default_template',
-            Config.DEFAULT_TEMPLATE_TYPE
+        # Generate Word document in the background; the copied context
+        # carries this request's session settings into the worker thread
+        job_id = uuid.uuid4().hex
+        future = _report_pool.submit(
+            contextvars.copy_context().run,
+            _build_report,
+            analysis_text,
+            process_name,
+            metadata
         )
+        with _report_jobs_lock:
+            _report_jobs[job_id] = (future, time.time())
+            _prune_report_jobs()
         
-        try:
-            # Generate Word document
-            filename = create_process_document(
-                analysis_text,
-                process_name,
-                metadata,
-                template_type=template_type
-            )
-            
-            logger.info(f"Generated Word report: {filename}")
-            
-            return jsonify({
-                'success': True,
-                'filename': filename,
-                'download_url': f'/api/download/{filename}'
-            })
-        finally:
-            # Restore original config values
-            for key, value in original_config.items():
-                setattr(Config, key, value)
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f'/api/reports/status/{job_id}'
+        }), 202
         
     except Exception as e:
         logger.error(f"Error generating Word report: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/reports/status/<job_id>', methods=['GET'])
+@app.route('/api/generate-word-report/status/<job_id>', methods=['GET'])
+def report_status(job_id):
+    """
+    Get the status of a background report generation job.
+    
+    Args:
+        job_id: Job identifier returned by /api/generate-word-report
+        
+    Returns:
+        JSON with status (running, done, error) and, when done, the
+        filename and download URL
+    """
+    with _report_jobs_lock:
+        _prune_report_jobs()
+        job = _report_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    future, _ = job
+    
+    if not future.done():
+        return jsonify({'status': 'running'})
+    
+    try:
+        filename = future.result()
+    except Exception as e:
+        logger.error(f"Error generating Word report: {e}")
+        return jsonify({'status': 'error', 'error': str(e)}), 500
+    
+    return jsonify({
+        'status': 'done',
+        'filename': filename,
+        'download_url': f'/api/download/{filename}'
+    })
+
+
 @app.route('/api/download/<filename>', methods=['GET'])
 def download_file(filename):
     """
@@ -580,24 +1159,32 @@ def download_file(filename):
     Returns:
         File download response
     """
+    if not _SAFE_REPORT_NAME.fullmatch(filename):
+        return jsonify({'error': 'Invalid filename'}), 400
+    
     try:
-        # Sanitize filename
-        filename = secure_filename(filename)
-        filepath = os.path.join('generated_reports', filename)
-        
-        if not os.path.exists(filepath):
-            return jsonify({'error': 'File not found'}), 404
-        
-        return send_file(
-            filepath,
+        # send_from_directory does the existence check (NotFound) and guards
+        # against traversal; conditional=True answers If-None-Match/
+        # If-Modified-Since with 304 and honours Range requests. Report
+        # names are timestamped, so browsers may reuse them for an hour.
+        return send_from_directory(
+            'generated_reports',
+            filename,
             as_attachment=True,
             download_name=filename,
             mimetype=(
                 'application/vnd.openxmlformats-'
                 'officedocument.wordprocessingml.document'
-            )
+            ),
+            conditional=True,
+            etag=True,
+            max_age=3600
         )
         
+    except NotFound:
+        # Drop reports removed from disk behind our back from the listing
+        reports_index.discard(filename)
+        return jsonify({'error': 'File not found'}), 404
     except Exception as e:
         logger.error(f"Error downloading file: {e}")
         return jsonify({'error': str(e)}), 500
@@ -612,7 +1199,7 @@ def list_reports():
         JSON array of file information
     """
     try:
-        reports = list_generated_reports()
+        reports = reports_index.listing()
         return jsonify({
             'success': True,
             'reports': reports
@@ -638,6 +1225,7 @@ def cleanup_reports():
         hours = data.get('hours', 24)
         
         deleted_count = cleanup_old_reports(hours)
+        reports_index.scan()
         
         return jsonify({
             'success': True,
@@ -708,6 +1296,8 @@ def check_workflow_artifacts(run_id):
         result = github_client.check_and_download_artifact(
             run_id, 'sox-report'
         )
+        if result.get('filename'):
+            reports_index.add(result['filename'])
         
         return jsonify(result)
         
@@ -773,36 +1363,31 @@ def parse_ml_metrics_endpoint():
         }
     
     Returns:
-        JSON with parsed and formatted metrics
+        JSON with parsed and formatted metrics, summary, validation
+        results and overall score
     """
     try:
         if not Config.MLOPS_FEATURES_ENABLED:
             return jsonify({'error': 'MLOps features not enabled. Set MLOPS_FEATURES_ENABLED=true in .env'}), 403
         
         # Import only if used (lazy loading for isolation)
-        from mlops_helpers import parse_ml_metrics, format_ml_metrics_for_document, get_metrics_summary
+        from mlops_helpers import process_metrics
         
         data = request.get_json()
         if not data or 'metrics' not in data:
             return jsonify({'error': 'Missing metrics in request body'}), 400
         
-        metrics_input = data['metrics']
-        
-        # Parse metrics
-        parsed = parse_ml_metrics(metrics_input)
+        required = data.get('required')
+        if required is not None and (
+            not isinstance(required, list) or
+            not all(isinstance(name, str) for name in required)
+        ):
+            return jsonify({'error': 'required must be a list of metric names'}), 400
         
-        # Format for document
-        formatted = format_ml_metrics_for_document(parsed)
+        # Parse once; formatting, summary, validation and score share the result
+        result = process_metrics(data['metrics'], required)
         
-        # Get summary
-        summary = get_metrics_summary(parsed)
-        
-        return jsonify({
-            'success': True,
-            'parsed_metrics': parsed,
-            'formatted_text': formatted,
-            'summary': summary
-        })
+        return jsonify({'success': True, **result})
         
     except Exception as e:
         logger.error(f"Error parsing ML metrics: {e}")
@@ -902,6 +1487,24 @@ def mlops_templates_list():
 # End MLOps Section
 
 
+# Periodic report cleanup (skipped in the debug reloader's parent process
+# so the job isn't scheduled twice)
+if not Config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+    _scheduler = BackgroundScheduler(daemon=True)
+    _scheduler.add_job(
+        _scheduled_report_cleanup,
+        'interval',
+        hours=Config.REPORT_CLEANUP_INTERVAL_HOURS,
+        id='report_cleanup',
+        coalesce=True,
+        max_instances=1
+    )
+    _scheduler.start()
+    atexit.register(_scheduler.shutdown, wait=False)
+
+
+# Local development server only; production runs under gunicorn:
+#   gunicorn app:app -c gunicorn.conf.py
 if __name__ == '__main__':
     app.run(
         debug=Config.DEBUG,
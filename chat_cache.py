@@ -0,0 +1,225 @@
+"""
+Query-keyed caches for the chat endpoints.
+Short-circuits repeat and near-duplicate queries: whole responses (before
+RAG retrieval, GitHub fetches and Gemini generation) and retrieved RAG
+context (before the ChromaDB search).
+"""
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from logger import logger
+from config import Config
+
+
+class ChatCache:
+    """Two-tier (exact + semantic) LRU cache keyed by user query."""
+
+    def __init__(self, max_entries=None, ttl_seconds=None,
+                 similarity_threshold=None, name='Chat'):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached entries
+            ttl_seconds: Seconds before a cached entry expires
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            name: Label used in log messages
+        """
+        self.max_entries = max_entries or Config.CHAT_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or Config.CHAT_CACHE_TTL
+        self.similarity_threshold = (
+            similarity_threshold or Config.CHAT_CACHE_SIMILARITY
+        )
+        self.name = name
+
+        self._lock = threading.Lock()
+        # Exact tier: normalized query -> entry, kept in LRU order
+        self._entries = OrderedDict()
+        # Semantic tier: contiguous float32 matrix of L2-normalized query
+        # embeddings (first _size rows live), grown by doubling
+        self._matrix = None
+        self._timestamps = None
+        self._size = 0
+        self._row_keys = []
+        self._key_rows = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query):
+        """Normalize a query for exact-match lookup."""
+        return ' '.join(query.lower().split())
+
+    def get(self, query, query_embedding=None, accept=None):
+        """
+        Look up a cached entry for a query.
+
+        Args:
+            query: User query
+            query_embedding: Embedding of the query (enables semantic hits)
+            accept: Optional callable given the grounding stored with a
+                semantic match; returning False turns the match into a miss.
+                Called without the cache lock held.
+
+        Returns:
+            Cached payload, or None on a miss
+        """
+        key = self.normalize(query)
+        now = time.monotonic()
+        match = None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry['created'] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry['payload']
+
+            if query_embedding is not None and self._size:
+                q = np.asarray(query_embedding, dtype=np.float32)
+                q_norm = np.linalg.norm(q)
+                if q_norm > 0:
+                    # Rows are unit length, so one matvec gives cosines
+                    n = self._size
+                    scores = self._matrix[:n] @ (q / q_norm)
+                    # Expired rows never count as semantic hits
+                    scores[now - self._timestamps[:n] >= self.ttl_seconds] = -1.0
+                    best = int(np.argmax(scores))
+                    if scores[best] > self.similarity_threshold:
+                        match_key = self._row_keys[best]
+                        match = (
+                            match_key, float(scores[best]),
+                            self._entries[match_key]
+                        )
+
+            if match is None:
+                self.misses += 1
+                return None
+
+        match_key, similarity, entry = match
+        accepted = (
+            accept is None or entry['grounding'] is None or
+            accept(entry['grounding'])
+        )
+        with self._lock:
+            if not accepted:
+                self.misses += 1
+                logger.info(
+                    f"{self.name} cache semantic match rejected (similarity "
+                    f"{similarity:.3f}, grounding differs)"
+                )
+                return None
+            if match_key in self._entries:
+                self._entries.move_to_end(match_key)
+            self.hits += 1
+        logger.info(
+            f"{self.name} cache semantic hit (similarity {similarity:.3f})"
+        )
+        return entry['payload']
+
+    def put(self, query, payload, query_embedding=None, grounding=None):
+        """
+        Store a payload for a query.
+
+        Args:
+            query: User query
+            payload: Payload to cache (response dict, RAG chunks, ...)
+            query_embedding: Embedding of the query
+            grounding: What the payload was derived from (e.g. retrieved
+                chunk ids), handed to get()'s accept check on semantic hits
+        """
+        key = self.normalize(query)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = {
+                'payload': payload,
+                'grounding': grounding,
+                'created': time.monotonic()
+            }
+
+            if query_embedding is not None:
+                self._append_row(key, query_embedding)
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def clear(self):
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self._timestamps = None
+            self._size = 0
+            self._row_keys = []
+            self._key_rows = {}
+        logger.info(f"{self.name} cache cleared")
+
+    def stats(self):
+        """Evict expired entries and return cache statistics."""
+        with self._lock:
+            now = time.monotonic()
+            expired = [
+                key for key, entry in self._entries.items()
+                if now - entry['created'] >= self.ttl_seconds
+            ]
+            for key in expired:
+                self._remove(key)
+
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'semantic_entries': self._size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0
+            }
+
+    def _append_row(self, key, query_embedding):
+        """Add a normalized embedding row for the semantic tier."""
+        row = np.asarray(query_embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(row)
+        if norm == 0:
+            return
+
+        if self._matrix is None:
+            capacity = min(64, self.max_entries + 1)
+            self._matrix = np.empty((capacity, row.shape[0]), dtype=np.float32)
+            self._timestamps = np.empty(capacity)
+        elif self._size == self._matrix.shape[0]:
+            capacity = self._matrix.shape[0] * 2
+            matrix = np.empty((capacity, self._matrix.shape[1]), dtype=np.float32)
+            matrix[:self._size] = self._matrix[:self._size]
+            timestamps = np.empty(capacity)
+            timestamps[:self._size] = self._timestamps[:self._size]
+            self._matrix, self._timestamps = matrix, timestamps
+
+        idx = self._size
+        self._matrix[idx] = row / norm
+        self._timestamps[idx] = time.monotonic()
+        self._row_keys.append(key)
+        self._key_rows[key] = idx
+        self._size += 1
+
+    def _remove(self, key):
+        """Remove an entry and its embedding row (lock must be held)."""
+        self._entries.pop(key, None)
+        idx = self._key_rows.pop(key, None)
+        if idx is None:
+            return
+
+        # Move the last live row into the hole instead of shifting the matrix
+        last = self._size - 1
+        if idx != last:
+            moved_key = self._row_keys[last]
+            self._matrix[idx] = self._matrix[last]
+            self._timestamps[idx] = self._timestamps[last]
+            self._row_keys[idx] = moved_key
+            self._key_rows[moved_key] = idx
+        self._row_keys.pop()
+        self._size -= 1
@@ -3,12 +3,34 @@ Configuration module for the RAG Chatbot.
 Loads and validates environment variables.
 """
 import os
+import re
+from contextvars import ContextVar
+from functools import lru_cache
 from dotenv import load_dotenv
 from logger import logger
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Compiled once; used to validate brand colors (#RRGGBB)
+_HEX_COLOR_RE = re.compile(r'#[0-9A-Fa-f]{6}')
+
+# Image formats accepted for the document logo
+_LOGO_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.bmp'})
+
+# Per-request document settings from the user's session, keyed by session
+# key -> (ContextVar, Config attribute). Set before each request; None
+# means the Config value applies. Replaces mutating Config per request.
+SESSION_OVERRIDES = {
+    'project_name': (ContextVar('project_name', default=None), 'PROJECT_NAME'),
+    'company_name': (ContextVar('company_name', default=None), 'COMPANY_NAME'),
+    'brand_color': (ContextVar('brand_color', default=None), 'BRAND_COLOR'),
+    'logo_path': (ContextVar('logo_path', default=None), 'DOCUMENT_LOGO_PATH'),
+    'default_template': (
+        ContextVar('default_template', default=None), 'DEFAULT_TEMPLATE_TYPE'
+    )
+}
+
 
 class Config:
     """Application configuration class."""
@@ -32,7 +54,8 @@ class Config:
     
     # Upload Configuration
     UPLOAD_FOLDER = 'uploads'
-    ALLOWED_EXTENSIONS = {'txt', 'pdf', 'docx'}
+    ALLOWED_EXTENSIONS = frozenset({'txt', 'pdf', 'docx'})
+    ALLOWED_EXTENSIONS_DISPLAY = ', '.join(sorted(ALLOWED_EXTENSIONS))
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     
     # Logging Configuration
@@ -44,15 +67,35 @@ class Config:
     CHUNK_OVERLAP = 200  # Overlap between chunks
     TOP_K_RESULTS = 3  # Number of relevant chunks to retrieve
     
+    # Chat Response Cache Configuration
+    CHAT_CACHE_MAX_ENTRIES = int(os.getenv('CHAT_CACHE_MAX_ENTRIES', '1000'))
+    CHAT_CACHE_TTL = int(os.getenv('CHAT_CACHE_TTL', '3600'))  # Seconds
+    CHAT_CACHE_SIMILARITY = float(os.getenv('CHAT_CACHE_SIMILARITY', '0.95'))
+    # Minimum overlap (Jaccard) between the chunks a paraphrase retrieves and
+    # those a cached answer was built from for the answer to be reused
+    CHAT_CACHE_GROUNDING = float(os.getenv('CHAT_CACHE_GROUNDING', '0.8'))
+    
+    # RAG Retrieval Cache Configuration (uses CHAT_CACHE_SIMILARITY)
+    RETRIEVAL_CACHE_MAX_ENTRIES = int(
+        os.getenv('RETRIEVAL_CACHE_MAX_ENTRIES', '2000')
+    )
+    RETRIEVAL_CACHE_TTL = int(os.getenv('RETRIEVAL_CACHE_TTL', '300'))  # Seconds
+    
     # Gemini Model Configuration
     GEMINI_MODEL = 'gemini-2.5-flash'  # Latest stable Gemini 2.5 Flash model
     GEMINI_EMBEDDING_MODEL = 'models/text-embedding-004'
     TEMPERATURE = float(os.getenv('GEMINI_TEMPERATURE', '0.7'))
     MAX_OUTPUT_TOKENS = int(os.getenv('GEMINI_MAX_TOKENS', '2048'))
+    # Load the model and connect in the background at startup
+    GEMINI_WARMUP = os.getenv('GEMINI_WARMUP', 'True').lower() == 'true'
+    # Window (ms) in which concurrent /api/chat generations are coalesced
+    # into one batched Gemini call; 0 disables batching
+    CHAT_BATCH_WINDOW_MS = int(os.getenv('CHAT_BATCH_WINDOW_MS', '0'))
     
     # System Prompt Configuration
     SYSTEM_PROMPT_TEMPLATE = os.getenv('SYSTEM_PROMPT_TEMPLATE', 'default')
     CUSTOM_SYSTEM_PROMPT = os.getenv('CUSTOM_SYSTEM_PROMPT', '')
+    PROMPT_VERSION = 0  # Bumped whenever the prompt config changes (ETag)
     
     # Document Template Configuration (Phase 3)
     PROJECT_NAME = os.getenv('PROJECT_NAME', 'GitHub Process Manager')
@@ -64,6 +107,12 @@ class Config:
         'DOCUMENT_TEMPLATES_PATH', 'document_templates.json'
     )
     
+    # Generated Report Retention
+    REPORT_RETENTION_HOURS = int(os.getenv('REPORT_RETENTION_HOURS', '24'))
+    REPORT_CLEANUP_INTERVAL_HOURS = int(
+        os.getenv('REPORT_CLEANUP_INTERVAL_HOURS', '1')
+    )
+    
     # MLOps-specific configuration (optional, isolated from core features)
     MLOPS_FEATURES_ENABLED = os.getenv(
         'MLOPS_FEATURES_ENABLED', 'false'
@@ -130,11 +179,9 @@ class Config:
     @staticmethod
     def validate_color_format(color_string):
         """Validate hex color format (#RRGGBB)."""
-        import re
         if not color_string:
             return True  # Empty is allowed
-        pattern = r'^#[0-9A-Fa-f]{6}$'
-        return bool(re.match(pattern, color_string))
+        return bool(_HEX_COLOR_RE.fullmatch(color_string))
     
     @staticmethod
     def validate_logo_path(logo_path):
@@ -143,14 +190,13 @@ class Config:
             return True  # Empty is allowed
         if os.path.exists(logo_path):
             # Check if it's an image file
-            valid_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.bmp'}
             _, ext = os.path.splitext(logo_path)
-            if ext.lower() in valid_extensions:
+            if ext.lower() in _LOGO_EXTENSIONS:
                 return True
             else:
                 logger.warning(
                     f"Logo file {logo_path} has unsupported format. "
-                    f"Use: {valid_extensions}"
+                    f"Use: {', '.join(sorted(_LOGO_EXTENSIONS))}"
                 )
                 return False
         else:
@@ -220,29 +266,73 @@ class Config:
     @staticmethod
     def get_system_prompt():
         """Get the active system prompt based on configuration."""
+        return Config._resolve_system_prompt(
+            Config.SYSTEM_PROMPT_TEMPLATE, Config.CUSTOM_SYSTEM_PROMPT
+        )
+    
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _resolve_system_prompt(template, custom_prompt):
+        """Resolve (and memoize) the system prompt for a configuration."""
         # Custom prompt takes precedence
-        if Config.CUSTOM_SYSTEM_PROMPT:
-            return Config.CUSTOM_SYSTEM_PROMPT
+        if custom_prompt:
+            return custom_prompt
         
         # Use template from config
-        template = Config.SYSTEM_PROMPT_TEMPLATE
         return Config.SYSTEM_PROMPTS.get(
             template, Config.SYSTEM_PROMPTS['default']
         )
     
     @staticmethod
+    @lru_cache(maxsize=1)
     def get_available_prompts():
-        """Get list of available prompt templates."""
-        return list(Config.SYSTEM_PROMPTS.keys())
+        """Get tuple of available prompt templates."""
+        return tuple(Config.SYSTEM_PROMPTS.keys())
+    
+    @staticmethod
+    def clear_prompt_cache():
+        """Clear memoized prompt lookups after the prompt config changes."""
+        Config._resolve_system_prompt.cache_clear()
+        Config.get_available_prompts.cache_clear()
+        Config.PROMPT_VERSION += 1
+    
+    @staticmethod
+    def effective(key):
+        """
+        Get a session-overridable document setting for the current context.
+        
+        Args:
+            key: Session key (project_name, company_name, brand_color,
+                logo_path, default_template)
+        
+        Returns:
+            The session value if set for this request, else the Config value
+        """
+        var, attr = SESSION_OVERRIDES[key]
+        value = var.get()
+        return getattr(Config, attr) if value is None else value
+    
+    @staticmethod
+    def set_session_overrides(session):
+        """Bind the session's document settings to the current context."""
+        for key, (var, _) in SESSION_OVERRIDES.items():
+            var.set(session.get(key))
+    
+    @staticmethod
+    def get_brand_color_rgb(color=None):
+        """Convert brand color hex (default: effective brand color) to RGB tuple for Word documents."""
+        return Config._hex_to_rgb(color or Config.effective('brand_color'))
     
     @staticmethod
-    def get_brand_color_rgb():
-        """Convert brand color hex to RGB tuple for Word documents."""
-        hex_color = Config.BRAND_COLOR.lstrip('#')
+    @lru_cache(maxsize=32)
+    def _hex_to_rgb(color):
+        """Parse a #RRGGBB string (memoized; few distinct colors are in use)."""
+        hex_color = color.lstrip('#')
         return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
     @staticmethod
     def allowed_file(filename):
         """Check if file extension is allowed."""
-        return '.' in filename and \
-               filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
+        dot = filename.rfind('.')
+        return dot != -1 and \
+               filename[dot + 1:].lower() in Config.ALLOWED_EXTENSIONS
@@ -2,18 +2,198 @@
 Gemini API client for chat functionality.
 Handles query processing with RAG context and GitHub data.
 """
-import google.generativeai as genai
+import re
+import threading
+import time
+from concurrent.futures import Future
 from logger import logger
 from config import Config
 
+# Prefix of the fallback message returned when generation fails
+ERROR_RESPONSE_PREFIX = "I apologize, but I encountered an error"
+
+# Output token ceiling for batched generation (model maximum)
+MAX_BATCH_OUTPUT_TOKENS = 65536
+
+# Retrieved chunks overlap (chunking uses overlapping windows, and the same
+# document may be uploaded twice); a chunk whose word 5-shingles overlap an
+# already included chunk's by more than this is left out of the prompt
+NEAR_DUPLICATE_JACCARD = 0.8
+SHINGLE_SIZE = 5
+
+# Cap on RAG text per question (~8k tokens at ~4 characters per token);
+# lower-ranked chunks past it are dropped
+MAX_RAG_CONTEXT_CHARS = 32000
+
+# Delimiter the model is asked to put before each batched answer
+_ANSWER_MARKER = re.compile(r'^=== ANSWER (\d+) ===[ \t]*$', re.MULTILINE)
+
+# Keywords that select a structured response, checked in order (SOX first).
+# Each list is compiled into one case-insensitive alternation so a query is
+# scanned once per type instead of once per keyword; matching is plain
+# substring matching, as before.
+_QUERY_TYPE_KEYWORDS = (
+    ('sox_audit', (
+        'sox control', 'control analysis', 'control objective',
+        'testing procedure', 'sox', 'control test', 'audit',
+        'compliance', 'internal control'
+    )),
+    ('mlops_workflow', (
+        'model', 'mlops', 'machine learning', 'training',
+        'inference', 'dataset', 'ml pipeline', 'model deployment',
+        'feature engineering', 'hyperparameter', 'ml workflow'
+    )),
+    ('devops_pipeline', (
+        'pipeline', 'ci/cd', 'deployment', 'build', 'release',
+        'devops', 'kubernetes', 'docker', 'container', 'jenkins',
+        'gitlab ci', 'github actions'
+    ))
+)
+_QUERY_TYPE_PATTERNS = tuple(
+    (query_type, re.compile('|'.join(map(re.escape, keywords)), re.IGNORECASE))
+    for query_type, keywords in _QUERY_TYPE_KEYWORDS
+)
+
+# Structured-response instructions per detected query type
+SOX_AUDIT_INSTRUCTIONS = (
+    "\n\n**IMPORTANT: SOX Control Analysis Structure**\n"
+    "When analyzing SOX controls, structure your response with these 5 sections:\n\n"
+    "1. Control Objective\n"
+    "   - Clearly state what the control aims to achieve\n"
+    "   - Describe the purpose and scope\n\n"
+    "2. Risks Addressed\n"
+    "   - List specific risks mitigated by this control\n"
+    "   - Use bullet points for clarity\n\n"
+    "3. Testing Procedures\n"
+    "   - Provide step-by-step testing procedures\n"
+    "   - Include sample size and selection criteria\n"
+    "   - Detail what evidence to examine\n\n"
+    "4. Test Results and Findings\n"
+    "   - Report observations from testing\n"
+    "   - Note any exceptions or issues identified\n"
+    "   - Include quantitative results (e.g., 25/25 samples passed)\n\n"
+    "5. Conclusion and Recommendation\n"
+    "   - Provide overall assessment of control effectiveness\n"
+    "   - Recommend any remediation actions if needed\n"
+    "   - State whether control is operating effectively\n\n"
+    "Use numbered headings exactly as shown above for consistency."
+)
+
+MLOPS_INSTRUCTIONS = (
+    "\n\n**IMPORTANT: MLOps Workflow Documentation Structure**\n"
+    "When documenting ML workflows, structure your response with these 5 sections:\n\n"
+    "1. Model Overview\n"
+    "   - Describe model architecture and purpose\n"
+    "   - Define inputs, outputs, and use case\n\n"
+    "2. Data Pipeline\n"
+    "   - Detail data sources and preprocessing steps\n"
+    "   - Explain data validation and quality checks\n"
+    "   - Describe feature engineering process\n\n"
+    "3. Training Process\n"
+    "   - Document training methodology\n"
+    "   - Specify hyperparameters and configurations\n"
+    "   - Describe experiment tracking approach\n\n"
+    "4. Validation Results\n"
+    "   - Report performance metrics (accuracy, F1, etc.)\n"
+    "   - Include test dataset results\n"
+    "   - Document any model limitations or biases\n\n"
+    "5. Deployment Plan\n"
+    "   - Specify serving infrastructure\n"
+    "   - Describe monitoring and alerting strategy\n"
+    "   - Define rollback procedures\n\n"
+    "Use numbered headings exactly as shown above for consistency."
+)
+
+DEVOPS_INSTRUCTIONS = (
+    "\n\n**IMPORTANT: DevOps Pipeline Documentation Structure**\n"
+    "When documenting DevOps pipelines, structure your response with these 5 sections:\n\n"
+    "1. Pipeline Overview\n"
+    "   - Describe pipeline purpose and triggers\n"
+    "   - Define pipeline stages and flow\n\n"
+    "2. Build Steps\n"
+    "   - Detail compilation and build process\n"
+    "   - List dependencies and build tools\n"
+    "   - Describe artifact generation\n\n"
+    "3. Test and Quality Gates\n"
+    "   - Document test suites (unit, integration, e2e)\n"
+    "   - Specify quality metrics and thresholds\n"
+    "   - Describe security scanning steps\n\n"
+    "4. Deployment Process\n"
+    "   - Define deployment stages (dev, staging, prod)\n"
+    "   - Specify deployment strategy (blue-green, canary, etc.)\n"
+    "   - Document approval requirements\n\n"
+    "5. Monitoring and Rollback\n"
+    "   - Describe post-deployment monitoring\n"
+    "   - Define success criteria\n"
+    "   - Specify rollback procedures and triggers\n\n"
+    "Use numbered headings exactly as shown above for consistency."
+)
+
+_TYPE_INSTRUCTIONS = {
+    'sox_audit': SOX_AUDIT_INSTRUCTIONS,
+    'mlops_workflow': MLOPS_INSTRUCTIONS,
+    'devops_pipeline': DEVOPS_INSTRUCTIONS
+}
+
+# Closing instruction of single-question prompts
+_RESPONSE_INSTRUCTION = (
+    "\n\nPlease provide a helpful and accurate response based on the information above. "
+    "Cite specific documents or GitHub data when relevant."
+)
+
+
+def _shingles(text):
+    """Return the set of word SHINGLE_SIZE-grams of a text."""
+    words = text.lower().split()
+    if len(words) <= SHINGLE_SIZE:
+        return {tuple(words)}
+    return {
+        tuple(words[i:i + SHINGLE_SIZE])
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def _select_chunks(rag_context):
+    """
+    Drop empty, duplicate and near-duplicate chunks and cap total text.
+    
+    Chunks are taken in retrieval (relevance) order, so the best-ranked
+    copy of repeated text is the one kept.
+    """
+    selected = []
+    seen = []
+    total = 0
+    for chunk in rag_context:
+        text = chunk.text
+        if not text.strip():
+            continue
+        
+        shingles = _shingles(text)
+        if any(
+            len(shingles & other) / len(shingles | other) > NEAR_DUPLICATE_JACCARD
+            for other in seen
+        ):
+            continue
+        
+        if selected and total + len(text) > MAX_RAG_CONTEXT_CHARS:
+            break
+        
+        selected.append(chunk)
+        seen.append(shingles)
+        total += len(text)
+    return selected
+
+
 class GeminiClient:
     """Client for interacting with Gemini API."""
     
     def __init__(self):
-        """Initialize Gemini client."""
+        """Initialize Gemini client (the SDK model is created on first use)."""
         try:
-            genai.configure(api_key=Config.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel(Config.GEMINI_MODEL)
+            self._model = None
+            self._model_lock = threading.Lock()
+            # (github_data, rendered prompt lines) of the last GitHub context
+            self._github_prompt = (None, [])
             
             # Configure generation settings
             self.generation_config = {
@@ -21,12 +201,51 @@ class GeminiClient:
                 'max_output_tokens': Config.MAX_OUTPUT_TOKENS,
             }
             
+            # Active system prompt (swapped in place on prompt updates)
+            self.set_system_prompt(Config.get_system_prompt())
+            
             logger.info("Gemini client initialized successfully")
             
         except Exception as e:
             logger.error(f"Failed to initialize Gemini client: {e}")
             raise
     
+    @property
+    def model(self):
+        """
+        The Gemini GenerativeModel, created on first use.
+        
+        Building it is kept out of __init__ so it happens off the startup
+        path: in the background warm_up() task when GEMINI_WARMUP is on,
+        otherwise on the first generation call. It doesn't avoid loading
+        the SDK, which RAGEngine imports and configures for embeddings.
+        """
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=Config.GEMINI_API_KEY)
+                    self._model = genai.GenerativeModel(Config.GEMINI_MODEL)
+                    logger.info(f"Gemini model {Config.GEMINI_MODEL} loaded")
+        return self._model
+    
+    def set_system_prompt(self, prompt):
+        """
+        Replace the system prompt without rebuilding the SDK client.
+        
+        Args:
+            prompt: New system prompt text
+        """
+        self.system_prompt = prompt
+        # Static head of single-question prompts per query type (system
+        # prompt plus structured-response instructions), built once per
+        # prompt change rather than on every request
+        self._prompt_heads = {
+            query_type: f"{prompt}\n{instructions}"
+            for query_type, instructions in _TYPE_INSTRUCTIONS.items()
+        }
+        logger.info("Gemini system prompt updated")
+    
     def generate_response(self, user_query, rag_context=None, github_data=None):
         """
         Generate response using Gemini with RAG context and GitHub data.
@@ -59,7 +278,101 @@ class GeminiClient:
             
         except Exception as e:
             logger.error(f"Error generating response: {e}")
-            return f"I apologize, but I encountered an error: {str(e)}"
+            return f"{ERROR_RESPONSE_PREFIX}: {str(e)}"
+    
+    def generate_response_stream(self, user_query, rag_context=None,
+                                 github_data=None):
+        """
+        Stream a response from Gemini as text chunks are generated.
+        
+        Args:
+            user_query: User's question/query
+            rag_context: List of relevant document chunks from RAG
+            github_data: Relevant GitHub repository data
+        
+        Yields:
+            Response text chunks
+        """
+        try:
+            prompt = self._build_prompt(user_query, rag_context, github_data)
+            
+            logger.info(f"Streaming response for query: {user_query[:100]}...")
+            
+            response = self.model.generate_content(
+                prompt,
+                generation_config=self.generation_config,
+                stream=True
+            )
+            
+            for chunk in response:
+                # Chunks carrying only a finish reason or safety ratings
+                # have no parts, and .text raises on them
+                if not chunk.parts:
+                    continue
+                text = chunk.text
+                if text:
+                    yield text
+            
+            logger.info("Response streamed successfully")
+            
+        except Exception as e:
+            logger.error(f"Error streaming response: {e}")
+            yield f"{ERROR_RESPONSE_PREFIX}: {str(e)}"
+    
+    def generate_responses_batch(self, queries, rag_contexts=None,
+                                 github_data=None):
+        """
+        Answer several queries with a single Gemini call.
+        
+        All questions share one prompt (system prompt and GitHub data are
+        included once); the model is asked to separate its answers with
+        ``=== ANSWER n ===`` markers. Any answer missing from the batched
+        output is regenerated individually.
+        
+        Args:
+            queries: List of user questions
+            rag_contexts: List of RAG chunk lists, aligned with queries
+            github_data: Relevant GitHub repository data (shared)
+        
+        Returns:
+            List of response texts, aligned with queries
+        """
+        rag_contexts = rag_contexts or [None] * len(queries)
+        
+        try:
+            prompt = self._build_batch_prompt(queries, rag_contexts, github_data)
+            
+            logger.info(f"Generating batched response for {len(queries)} queries")
+            
+            generation_config = dict(self.generation_config)
+            generation_config['max_output_tokens'] = min(
+                Config.MAX_OUTPUT_TOKENS * len(queries),
+                MAX_BATCH_OUTPUT_TOKENS
+            )
+            response = self.model.generate_content(
+                prompt,
+                generation_config=generation_config
+            )
+            answers = self._split_batch_answers(response.text, len(queries))
+            
+        except Exception as e:
+            logger.error(f"Error generating batched response: {e}")
+            answers = [None] * len(queries)
+        
+        missing = [i for i, answer in enumerate(answers) if not answer]
+        if missing:
+            logger.warning(
+                f"Batched response missing {len(missing)} answer(s); "
+                "generating them individually"
+            )
+            for i in missing:
+                answers[i] = self.generate_response(
+                    queries[i],
+                    rag_context=rag_contexts[i],
+                    github_data=github_data
+                )
+        
+        return answers
     
     def _build_prompt(self, user_query, rag_context=None, github_data=None):
         """
@@ -73,75 +386,157 @@ class GeminiClient:
         Returns:
             Formatted prompt string
         """
-        prompt_parts = []
-        
-        # Detect query type for structured responses
+        # Start from the system prompt plus the type-specific instructions
+        # for structured responses ('generic' queries get none)
         query_type = self._detect_query_type(user_query)
-        
-        # Get system prompt from configuration
-        system_instruction = Config.get_system_prompt()
-        prompt_parts.append(system_instruction)
-        
-        # Add type-specific instructions for structured responses
-        if query_type == 'sox_audit':
-            prompt_parts.append(self._get_sox_audit_instructions())
-        elif query_type == 'mlops_workflow':
-            prompt_parts.append(self._get_mlops_instructions())
-        elif query_type == 'devops_pipeline':
-            prompt_parts.append(self._get_devops_instructions())
-        # For 'generic' type, no special structure needed
+        prompt_parts = [
+            self._prompt_heads.get(query_type, self.system_prompt)
+        ]
         
         # Add RAG context if available
-        if rag_context and len(rag_context) > 0:
-            prompt_parts.append("\n\n=== REFERENCE DOCUMENTS ===")
-            for i, chunk in enumerate(rag_context, 1):
-                filename = chunk.get('metadata', {}).get('filename', 'Unknown')
-                text = chunk.get('text', '')
-                prompt_parts.append(f"\n[Document {i}: {filename}]\n{text}")
+        prompt_parts.extend(self._format_rag_context(rag_context))
         
         # Add GitHub context if available
-        if github_data:
-            prompt_parts.append("\n\n=== GITHUB REPOSITORY DATA ===")
-            
-            if 'repository_info' in github_data:
-                info = github_data['repository_info']
-                prompt_parts.append(f"\nRepository: {info.get('name', 'N/A')}")
-                prompt_parts.append(f"Description: {info.get('description', 'N/A')}")
-                prompt_parts.append(f"Stars: {info.get('stars', 'N/A')}")
-            
-            if 'pull_requests' in github_data:
-                prs = github_data['pull_requests']
-                prompt_parts.append(f"\n\nRecent Pull Requests ({len(prs)}):")
-                for pr in prs[:5]:  # Limit to 5 PRs
-                    prompt_parts.append(f"- #{pr.get('number')}: {pr.get('title')} ({pr.get('state')})")
-            
-            if 'issues' in github_data:
-                issues = github_data['issues']
-                prompt_parts.append(f"\n\nRecent Issues ({len(issues)}):")
-                for issue in issues[:5]:  # Limit to 5 issues
-                    prompt_parts.append(f"- #{issue.get('number')}: {issue.get('title')} ({issue.get('state')})")
-            
-            if 'workflows' in github_data:
-                workflows = github_data['workflows']
-                prompt_parts.append(f"\n\nWorkflow Runs ({len(workflows)}):")
-                for wf in workflows[:3]:  # Limit to 3 workflows
-                    prompt_parts.append(f"- {wf.get('name')}: {wf.get('conclusion', 'running')}")
-            
-            if 'files' in github_data:
-                files = github_data['files']
-                prompt_parts.append(f"\n\nRepository Files: {', '.join(files[:10])}")
+        prompt_parts.extend(self._format_github_data(github_data))
         
         # Add user query
         prompt_parts.append(f"\n\n=== USER QUESTION ===\n{user_query}")
         
         # Add instruction for response
+        prompt_parts.append(_RESPONSE_INSTRUCTION)
+        
+        return "\n".join(prompt_parts)
+    
+    def _build_batch_prompt(self, queries, rag_contexts, github_data=None):
+        """
+        Build one prompt that asks for answers to several questions.
+        
+        Args:
+            queries: User questions
+            rag_contexts: RAG document chunks per question
+            github_data: GitHub repository data (shared)
+        
+        Returns:
+            Formatted prompt string
+        """
+        prompt_parts = [self.system_prompt]
+        
+        # Structured-response instructions for each query type present
+        query_types = [self._detect_query_type(q) for q in queries]
+        for query_type in dict.fromkeys(query_types):
+            instructions = _TYPE_INSTRUCTIONS.get(query_type)
+            if instructions:
+                prompt_parts.append(instructions)
+        
+        prompt_parts.extend(self._format_github_data(github_data))
+        
+        for n, (query, rag_context) in enumerate(zip(queries, rag_contexts), 1):
+            prompt_parts.append(f"\n\n=== QUESTION {n} ===\n{query}")
+            prompt_parts.extend(self._format_rag_context(
+                rag_context, heading=f"REFERENCE DOCUMENTS FOR QUESTION {n}"
+            ))
+        
         prompt_parts.append(
-            "\n\nPlease provide a helpful and accurate response based on the information above. "
-            "Cite specific documents or GitHub data when relevant."
+            f"\n\nAnswer each of the {len(queries)} questions above independently, "
+            "based on the information provided. Cite specific documents or GitHub "
+            "data when relevant. Start each answer with a line containing only "
+            "'=== ANSWER n ===', where n is the question number, and answer the "
+            "questions in order."
         )
         
         return "\n".join(prompt_parts)
     
+    @staticmethod
+    def _split_batch_answers(text, count):
+        """
+        Split batched model output on answer markers.
+        
+        Args:
+            text: Raw model output
+            count: Number of questions asked
+        
+        Returns:
+            List of answers (None where an answer is missing)
+        """
+        answers = [None] * count
+        matches = list(_ANSWER_MARKER.finditer(text))
+        for i, match in enumerate(matches):
+            n = int(match.group(1))
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            answer = text[match.end():end].strip()
+            if 1 <= n <= count and answer:
+                answers[n - 1] = answer
+        return answers
+    
+    def _format_rag_context(self, rag_context, heading="REFERENCE DOCUMENTS"):
+        """Format RAG chunks as prompt lines."""
+        parts = []
+        rag_context = _select_chunks(rag_context or [])
+        if rag_context:
+            parts.append(f"\n\n=== {heading} ===")
+            for i, chunk in enumerate(rag_context, 1):
+                parts.append(f"\n[Document {i}: {chunk.filename}]\n{chunk.text}")
+        return parts
+    
+    def _format_github_data(self, github_data):
+        """Format GitHub repository data as prompt lines."""
+        if not github_data:
+            return []
+        
+        # The app hands in the same github_data dict for every chat turn
+        # until it refetches; render it once and reuse the lines meanwhile
+        cached_data, cached_parts = self._github_prompt
+        if github_data is cached_data:
+            return cached_parts
+        
+        parts = ["\n\n=== GITHUB REPOSITORY DATA ==="]
+        
+        info = github_data.get('repository_info')
+        if info:
+            parts.append(f"\nRepository: {info.get('name', 'N/A')}")
+            parts.append(f"Description: {info.get('description', 'N/A')}")
+            parts.append(f"Stars: {info.get('stars', 'N/A')}")
+        
+        if 'pull_requests' in github_data:
+            prs = github_data['pull_requests']
+            parts.append(f"\n\nRecent Pull Requests ({len(prs)}):")
+            for pr in prs[:5]:  # Limit to 5 PRs
+                parts.append(f"- #{pr.number}: {pr.title} ({pr.state})")
+        
+        if 'issues' in github_data:
+            issues = github_data['issues']
+            parts.append(f"\n\nRecent Issues ({len(issues)}):")
+            for issue in issues[:5]:  # Limit to 5 issues
+                parts.append(f"- #{issue.number}: {issue.title} ({issue.state})")
+        
+        if 'workflows' in github_data:
+            workflows = github_data['workflows']
+            parts.append(f"\n\nWorkflow Runs ({len(workflows)}):")
+            for wf in workflows[:3]:  # Limit to 3 workflows
+                parts.append(f"- {wf.get('name')}: {wf.get('conclusion', 'running')}")
+        
+        if 'files' in github_data:
+            files = github_data['files']
+            parts.append(f"\n\nRepository Files: {', '.join(files[:10])}")
+        
+        self._github_prompt = (github_data, parts)
+        return parts
+    
+    def warm_up(self):
+        """
+        Load the model and open the API connection ahead of the first query.
+        
+        Runs in the background at startup so the first chat request doesn't
+        pay for the SDK import and connection setup. Failures are only
+        logged; the first real request retries.
+        """
+        try:
+            import google.generativeai as genai
+            genai.get_model(self.model.model_name)
+            logger.info("Gemini connection warmed up")
+        except Exception as e:
+            logger.warning(f"Gemini warm-up failed: {e}")
+    
     def test_connection(self):
         """
         Test Gemini API connection.
@@ -167,109 +562,90 @@ class GeminiClient:
         Returns:
             str: 'sox_audit', 'mlops_workflow', 'devops_pipeline', or 'generic'
         """
-        query_lower = query.lower()
-        
-        # SOX/Audit keywords
-        sox_keywords = ['sox control', 'control analysis', 'control objective', 
-                       'testing procedure', 'sox', 'control test', 'audit', 
-                       'compliance', 'internal control']
-        
-        # MLOps keywords
-        mlops_keywords = ['model', 'mlops', 'machine learning', 'training', 
-                         'inference', 'dataset', 'ml pipeline', 'model deployment',
-                         'feature engineering', 'hyperparameter', 'ml workflow']
-        
-        # DevOps keywords
-        devops_keywords = ['pipeline', 'ci/cd', 'deployment', 'build', 'release',
-                          'devops', 'kubernetes', 'docker', 'container', 'jenkins',
-                          'gitlab ci', 'github actions']
-        
-        # Check for each type
-        if any(keyword in query_lower for keyword in sox_keywords):
-            return 'sox_audit'
-        elif any(keyword in query_lower for keyword in mlops_keywords):
-            return 'mlops_workflow'
-        elif any(keyword in query_lower for keyword in devops_keywords):
-            return 'devops_pipeline'
-        else:
-            return 'generic'
+        for query_type, pattern in _QUERY_TYPE_PATTERNS:
+            if pattern.search(query):
+                return query_type
+        return 'generic'
+
+
+class ResponseBatcher:
+    """
+    Coalesces concurrent generate_response calls into batched Gemini calls.
     
-    def _get_sox_audit_instructions(self):
-        """SOX audit structured response instructions."""
-        return (
-            "\n\n**IMPORTANT: SOX Control Analysis Structure**\n"
-            "When analyzing SOX controls, structure your response with these 5 sections:\n\n"
-            "1. Control Objective\n"
-            "   - Clearly state what the control aims to achieve\n"
-            "   - Describe the purpose and scope\n\n"
-            "2. Risks Addressed\n"
-            "   - List specific risks mitigated by this control\n"
-            "   - Use bullet points for clarity\n\n"
-            "3. Testing Procedures\n"
-            "   - Provide step-by-step testing procedures\n"
-            "   - Include sample size and selection criteria\n"
-            "   - Detail what evidence to examine\n\n"
-            "4. Test Results and Findings\n"
-            "   - Report observations from testing\n"
-            "   - Note any exceptions or issues identified\n"
-            "   - Include quantitative results (e.g., 25/25 samples passed)\n\n"
-            "5. Conclusion and Recommendation\n"
-            "   - Provide overall assessment of control effectiveness\n"
-            "   - Recommend any remediation actions if needed\n"
-            "   - State whether control is operating effectively\n\n"
-            "Use numbered headings exactly as shown above for consistency."
-        )
+    The first caller in a window waits max_wait, then answers everything
+    that queued up meanwhile (up to max_batch) with generate_responses_batch;
+    a window holding a single call uses generate_response as usual. Calls
+    are only batched with others sharing the same github_data object.
+    """
     
-    def _get_mlops_instructions(self):
-        """MLOps workflow structured response instructions."""
-        return (
-            "\n\n**IMPORTANT: MLOps Workflow Documentation Structure**\n"
-            "When documenting ML workflows, structure your response with these 5 sections:\n\n"
-            "1. Model Overview\n"
-            "   - Describe model architecture and purpose\n"
-            "   - Define inputs, outputs, and use case\n\n"
-            "2. Data Pipeline\n"
-            "   - Detail data sources and preprocessing steps\n"
-            "   - Explain data validation and quality checks\n"
-            "   - Describe feature engineering process\n\n"
-            "3. Training Process\n"
-            "   - Document training methodology\n"
-            "   - Specify hyperparameters and configurations\n"
-            "   - Describe experiment tracking approach\n\n"
-            "4. Validation Results\n"
-            "   - Report performance metrics (accuracy, F1, etc.)\n"
-            "   - Include test dataset results\n"
-            "   - Document any model limitations or biases\n\n"
-            "5. Deployment Plan\n"
-            "   - Specify serving infrastructure\n"
-            "   - Describe monitoring and alerting strategy\n"
-            "   - Define rollback procedures\n\n"
-            "Use numbered headings exactly as shown above for consistency."
-        )
+    def __init__(self, client, max_wait, max_batch=32):
+        """
+        Initialize the batcher.
+        
+        Args:
+            client: GeminiClient used for generation
+            max_wait: Seconds the first call in a window waits for company
+            max_batch: Queued calls that trigger an immediate flush
+        """
+        self.client = client
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending = []
     
-    def _get_devops_instructions(self):
-        """DevOps pipeline structured response instructions."""
-        return (
-            "\n\n**IMPORTANT: DevOps Pipeline Documentation Structure**\n"
-            "When documenting DevOps pipelines, structure your response with these 5 sections:\n\n"
-            "1. Pipeline Overview\n"
-            "   - Describe pipeline purpose and triggers\n"
-            "   - Define pipeline stages and flow\n\n"
-            "2. Build Steps\n"
-            "   - Detail compilation and build process\n"
-            "   - List dependencies and build tools\n"
-            "   - Describe artifact generation\n\n"
-            "3. Test and Quality Gates\n"
-            "   - Document test suites (unit, integration, e2e)\n"
-            "   - Specify quality metrics and thresholds\n"
-            "   - Describe security scanning steps\n\n"
-            "4. Deployment Process\n"
-            "   - Define deployment stages (dev, staging, prod)\n"
-            "   - Specify deployment strategy (blue-green, canary, etc.)\n"
-            "   - Document approval requirements\n\n"
-            "5. Monitoring and Rollback\n"
-            "   - Describe post-deployment monitoring\n"
-            "   - Define success criteria\n"
-            "   - Specify rollback procedures and triggers\n\n"
-            "Use numbered headings exactly as shown above for consistency."
-        )
+    def generate_response(self, user_query, rag_context=None, github_data=None):
+        """
+        Generate a response, possibly as part of a batch.
+        
+        Args:
+            user_query: User's question/query
+            rag_context: List of relevant document chunks from RAG
+            github_data: Relevant GitHub repository data
+        
+        Returns:
+            Generated response text
+        """
+        future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((user_query, rag_context, github_data, future))
+            leader = len(self._pending) == 1
+            if len(self._pending) >= self.max_batch:
+                batch, self._pending = self._pending, []
+        
+        if batch is None and leader:
+            time.sleep(self.max_wait)
+            with self._lock:
+                batch, self._pending = self._pending, []
+        if batch:
+            self._run(batch)
+        
+        return future.result()
+    
+    def _run(self, batch):
+        """Answer one window of queued calls and resolve their futures."""
+        groups = {}
+        for item in batch:
+            groups.setdefault(id(item[2]), []).append(item)
+        
+        for items in groups.values():
+            try:
+                if len(items) == 1:
+                    query, rag_context, github_data, future = items[0]
+                    future.set_result(self.client.generate_response(
+                        query, rag_context=rag_context, github_data=github_data
+                    ))
+                    continue
+                
+                logger.info(f"Coalesced {len(items)} chat queries into one batch")
+                responses = self.client.generate_responses_batch(
+                    [item[0] for item in items],
+                    rag_contexts=[item[1] for item in items],
+                    github_data=items[0][2]
+                )
+                for item, response in zip(items, responses):
+                    item[3].set_result(response)
+            except Exception as e:
+                for item in items:
+                    if not item[3].done():
+                        item[3].set_exception(e)
@@ -2,10 +2,123 @@
 GitHub API client for repository integration.
 Handles authentication and data retrieval from GitHub repositories.
 """
+import os
+import atexit
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from urllib.parse import quote
+import httpx
+import msgspec
+from cachetools import TTLCache
 from github import Github, GithubException
 from logger import logger
 from config import Config
 
+GITHUB_API_URL = 'https://api.github.com'
+
+# Upper bound on PRs/issues fetched per call (one GitHub API page)
+MAX_RESULTS_LIMIT = 100
+
+# Resolved repositories, their metadata and workflows are reused for this
+# long, keyed by full name (owner/repo)
+REPO_CACHE_TTL = 300  # Seconds
+
+# Waits between looks for the run a workflow dispatch created (the API
+# doesn't return it), backing off instead of one fixed sleep
+WORKFLOW_RUN_POLL_DELAYS = (1, 2, 4, 8)  # Seconds
+
+# Artifact ZIPs are streamed into a spool that moves to disk past this size
+ARTIFACT_SPOOL_SIZE = 8 * 1024 * 1024
+ARTIFACT_CHUNK_SIZE = 64 * 1024
+
+
+def _parse_timestamp(value):
+    """
+    Parse a REST API ISO 8601 timestamp into an aware datetime.
+    
+    GitHub uses a 'Z' suffix, which fromisoformat only accepts from
+    Python 3.11 on.
+    """
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _timestamp(value):
+    """Render a REST API ISO 8601 timestamp as PyGithub's str(datetime) did."""
+    return str(_parse_timestamp(value)) if value else str(value)
+
+
+def _login(user):
+    """Return a REST API user's login (None for deleted users)."""
+    return user.login if user else 'ghost'
+
+
+class _RawUser(msgspec.Struct):
+    """REST API user (only the fields the client reads are decoded)."""
+    login: str
+
+
+class _RawLabel(msgspec.Struct):
+    """REST API label."""
+    name: str
+
+
+class _RawPull(msgspec.Struct):
+    """REST API pull request; bodies, diffs and links are skipped unparsed."""
+    number: int
+    title: str
+    state: str
+    html_url: str
+    user: Optional[_RawUser] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
+class _RawIssue(msgspec.Struct):
+    """REST API issue (pull_request is only set on pull requests)."""
+    number: int
+    title: str
+    state: str
+    html_url: str
+    user: Optional[_RawUser] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    labels: List[_RawLabel] = []
+    pull_request: Optional[dict] = None
+
+
+# Typed decoders for the list endpoints: msgspec validates into the structs
+# above in one pass and skips every other field without building it
+_PULLS_DECODER = msgspec.json.Decoder(List[_RawPull])
+_ISSUES_DECODER = msgspec.json.Decoder(List[_RawIssue])
+
+
+class PullRequest(msgspec.Struct):
+    """Pull request summary (encoded directly to JSON by msgspec)."""
+    number: int
+    title: str
+    state: str
+    author: str
+    created_at: str
+    updated_at: str
+    url: str
+
+
+class Issue(msgspec.Struct):
+    """Issue summary (encoded directly to JSON by msgspec)."""
+    number: int
+    title: str
+    state: str
+    author: str
+    created_at: str
+    updated_at: str
+    labels: List[str]
+    url: str
+
+
 class GitHubClient:
     """Client for interacting with GitHub API."""
     
@@ -15,12 +128,32 @@ class GitHubClient:
         self.repo = None
         self.token = Config.GITHUB_TOKEN
         self.repo_url = Config.GITHUB_REPO_URL
+        self._http = None
+        self._repo_cache = TTLCache(maxsize=32, ttl=REPO_CACHE_TTL)
+        self._repo_info_cache = TTLCache(maxsize=32, ttl=REPO_CACHE_TTL)
+        self._workflow_cache = TTLCache(maxsize=64, ttl=REPO_CACHE_TTL)
+        self._workflow_list_cache = TTLCache(maxsize=32, ttl=REPO_CACHE_TTL)
+        self._cache_lock = threading.Lock()
         
         # Skip GitHub initialization if token is invalid/placeholder
         if self.token and self.token != 'your_github_personal_access_token_here':
             try:
                 self.github = Github(self.token)
                 
+                # Shared keep-alive HTTP/2 client for direct REST calls
+                self._http = httpx.Client(
+                    base_url=GITHUB_API_URL,
+                    headers={
+                        'Authorization': f'Bearer {self.token}',
+                        'Accept': 'application/vnd.github+json'
+                    },
+                    http2=True,
+                    timeout=10.0,
+                    limits=httpx.Limits(max_keepalive_connections=20),
+                    follow_redirects=True
+                )
+                atexit.register(self._http.close)
+                
                 # Test authentication
                 user = self.github.get_user()
                 logger.info(f"GitHub authenticated as: {user.login}")
@@ -49,7 +182,13 @@ class GitHubClient:
             repo_name = parts[-1]
             
             full_name = f"{owner}/{repo_name}"
-            self.repo = self.github.get_repo(full_name)
+            with self._cache_lock:
+                repo = self._repo_cache.get(full_name)
+            if repo is None:
+                repo = self.github.get_repo(full_name)
+                with self._cache_lock:
+                    self._repo_cache[full_name] = repo
+            self.repo = repo
             
             logger.info(f"Connected to repository: {full_name}")
             
@@ -77,29 +216,59 @@ class GitHubClient:
     
     def get_repository_info(self):
         """
-        Get basic repository information.
+        Get basic repository information (cached for REPO_CACHE_TTL).
         
         Returns:
             Dictionary with repository metadata
         """
-        if not self.repo:
+        repo = self.repo
+        if not repo:
             return None
         
         try:
-            return {
-                'name': self.repo.full_name,
-                'description': self.repo.description,
-                'stars': self.repo.stargazers_count,
-                'forks': self.repo.forks_count,
-                'open_issues': self.repo.open_issues_count,
-                'language': self.repo.language,
-                'created_at': str(self.repo.created_at),
-                'updated_at': str(self.repo.updated_at)
+            with self._cache_lock:
+                info = self._repo_info_cache.get(repo.full_name)
+            if info is not None:
+                return dict(info)
+            
+            info = {
+                'name': repo.full_name,
+                'description': repo.description,
+                'stars': repo.stargazers_count,
+                'forks': repo.forks_count,
+                'open_issues': repo.open_issues_count,
+                'language': repo.language,
+                'created_at': str(repo.created_at),
+                'updated_at': str(repo.updated_at)
             }
+            with self._cache_lock:
+                self._repo_info_cache[repo.full_name] = info
+            return dict(info)
         except Exception as e:
             logger.error(f"Error getting repository info: {e}")
             return None
     
+    def _get_json(self, path, decoder=None, **params):
+        """
+        GET a repository REST endpoint with the shared HTTP client.
+        
+        One round trip per call, instead of PyGithub's paginated lists and
+        lazily completed objects.
+        
+        Args:
+            path: Path below /repos/{owner}/{repo}
+            decoder: Optional typed msgspec Decoder for the body
+            **params: Query parameters
+        
+        Returns:
+            Decoded JSON body
+        """
+        response = self._http.get(f'/repos/{self.repo.full_name}{path}', params=params)
+        response.raise_for_status()
+        if decoder is not None:
+            return decoder.decode(response.content)
+        return msgspec.json.decode(response.content)
+    
     def get_pull_requests(self, state='open', limit=10):
         """
         Get pull requests from repository.
@@ -109,25 +278,29 @@ class GitHubClient:
             limit: Maximum number of PRs to retrieve
         
         Returns:
-            List of pull request data
+            List of PullRequest structs
         """
         if not self.repo:
             return []
         
+        limit = min(max(1, limit), MAX_RESULTS_LIMIT)
+        
         try:
-            prs = self.repo.get_pulls(state=state)
+            prs = self._get_json(
+                '/pulls', decoder=_PULLS_DECODER, state=state, per_page=limit
+            )
             pr_list = []
             
             for pr in prs[:limit]:
-                pr_list.append({
-                    'number': pr.number,
-                    'title': pr.title,
-                    'state': pr.state,
-                    'author': pr.user.login,
-                    'created_at': str(pr.created_at),
-                    'updated_at': str(pr.updated_at),
-                    'url': pr.html_url
-                })
+                pr_list.append(PullRequest(
+                    number=pr.number,
+                    title=pr.title,
+                    state=pr.state,
+                    author=_login(pr.user),
+                    created_at=_timestamp(pr.created_at),
+                    updated_at=_timestamp(pr.updated_at),
+                    url=pr.html_url
+                ))
             
             logger.info(f"Retrieved {len(pr_list)} pull requests")
             return pr_list
@@ -145,30 +318,39 @@ class GitHubClient:
             limit: Maximum number of issues to retrieve
         
         Returns:
-            List of issue data
+            List of Issue structs
         """
         if not self.repo:
             return []
         
+        limit = min(max(1, limit), MAX_RESULTS_LIMIT)
+        
         try:
-            issues = self.repo.get_issues(state=state)
+            # The issues endpoint also returns pull requests (marked by a
+            # pull_request key); over-fetch so skipping them still leaves
+            # up to limit issues from the one request
+            issues = self._get_json(
+                '/issues', decoder=_ISSUES_DECODER, state=state,
+                per_page=min(limit * 2, MAX_RESULTS_LIMIT)
+            )
             issue_list = []
             
-            for issue in issues[:limit]:
-                # Skip pull requests (they appear in issues API)
-                if issue.pull_request:
+            for issue in issues:
+                if issue.pull_request is not None:
                     continue
+                if len(issue_list) == limit:
+                    break
                 
-                issue_list.append({
-                    'number': issue.number,
-                    'title': issue.title,
-                    'state': issue.state,
-                    'author': issue.user.login,
-                    'created_at': str(issue.created_at),
-                    'updated_at': str(issue.updated_at),
-                    'labels': [label.name for label in issue.labels],
-                    'url': issue.html_url
-                })
+                issue_list.append(Issue(
+                    number=issue.number,
+                    title=issue.title,
+                    state=issue.state,
+                    author=_login(issue.user),
+                    created_at=_timestamp(issue.created_at),
+                    updated_at=_timestamp(issue.updated_at),
+                    labels=[label.name for label in issue.labels],
+                    url=issue.html_url
+                ))
             
             logger.info(f"Retrieved {len(issue_list)} issues")
             return issue_list
@@ -190,19 +372,21 @@ class GitHubClient:
         if not self.repo:
             return []
         
+        limit = min(max(1, limit), MAX_RESULTS_LIMIT)
+        
         try:
-            workflows = self.repo.get_workflow_runs()
+            workflows = self._get_json('/actions/runs', per_page=limit)['workflow_runs']
             workflow_list = []
             
             for wf in workflows[:limit]:
                 workflow_list.append({
-                    'id': wf.id,
-                    'name': wf.name,
-                    'status': wf.status,
-                    'conclusion': wf.conclusion,
-                    'created_at': str(wf.created_at),
-                    'updated_at': str(wf.updated_at),
-                    'url': wf.html_url
+                    'id': wf['id'],
+                    'name': wf.get('name'),
+                    'status': wf.get('status'),
+                    'conclusion': wf.get('conclusion'),
+                    'created_at': _timestamp(wf.get('created_at')),
+                    'updated_at': _timestamp(wf.get('updated_at')),
+                    'url': wf.get('html_url')
                 })
             
             logger.info(f"Retrieved {len(workflow_list)} workflow runs")
@@ -227,11 +411,14 @@ class GitHubClient:
             return []
         
         try:
-            contents = self.repo.get_contents(path)
+            contents = self._get_json(f"/contents/{quote(path.strip('/'))}")
+            # A file path returns the file itself rather than a listing
+            if isinstance(contents, dict):
+                contents = [contents]
             file_list = []
             
             for content in contents[:limit]:
-                file_list.append(content.path)
+                file_list.append(content['path'])
             
             logger.info(f"Retrieved {len(file_list)} files from repository")
             return file_list
@@ -240,6 +427,25 @@ class GitHubClient:
             logger.error(f"Error getting repository files: {e}")
             return []
     
+    def _get_workflow(self, workflow_id):
+        """
+        Resolve a workflow by ID or filename (cached for REPO_CACHE_TTL).
+        
+        Args:
+            workflow_id: Workflow ID or filename
+        
+        Returns:
+            PyGithub Workflow
+        """
+        key = (self.repo.full_name, workflow_id)
+        with self._cache_lock:
+            workflow = self._workflow_cache.get(key)
+        if workflow is None:
+            workflow = self.repo.get_workflow(workflow_id)
+            with self._cache_lock:
+                self._workflow_cache[key] = workflow
+        return workflow
+    
     def trigger_workflow(self, workflow_id, ref='main', inputs=None):
         """
         Manually trigger a GitHub Actions workflow.
@@ -257,7 +463,7 @@ class GitHubClient:
             return False
         
         try:
-            workflow = self.repo.get_workflow(workflow_id)
+            workflow = self._get_workflow(workflow_id)
             result = workflow.create_dispatch(ref=ref, inputs=inputs or {})
             
             logger.info(f"Triggered workflow: {workflow_id} on {ref}")
@@ -272,25 +478,34 @@ class GitHubClient:
         List all available workflows in the repository.
         
         Returns:
-            List of workflow data
+            List of workflow data (cached for REPO_CACHE_TTL)
         """
         if not self.repo:
             return []
         
+        with self._cache_lock:
+            cached = self._workflow_list_cache.get(self.repo.full_name)
+        if cached is not None:
+            return list(cached)
+        
         try:
-            workflows = self.repo.get_workflows()
+            workflows = self._get_json(
+                '/actions/workflows', per_page=MAX_RESULTS_LIMIT
+            )['workflows']
             workflow_list = []
             
             for wf in workflows:
                 workflow_list.append({
-                    'id': wf.id,
-                    'name': wf.name,
-                    'path': wf.path,
-                    'state': wf.state
+                    'id': wf['id'],
+                    'name': wf['name'],
+                    'path': wf['path'],
+                    'state': wf['state']
                 })
             
             logger.info(f"Retrieved {len(workflow_list)} workflows")
-            return workflow_list
+            with self._cache_lock:
+                self._workflow_list_cache[self.repo.full_name] = workflow_list
+            return list(workflow_list)
             
         except Exception as e:
             logger.error(f"Error listing workflows: {e}")
@@ -318,7 +533,7 @@ class GitHubClient:
             raise Exception("GitHub repository not connected")
         
         try:
-            workflow = self.repo.get_workflow(workflow_file)
+            workflow = self._get_workflow(workflow_file)
             
             # Prepare inputs
             inputs = {
@@ -327,23 +542,19 @@ class GitHubClient:
                 'analysis_type': analysis_type
             }
             
-            # Trigger workflow
+            # Trigger workflow (allow for clock skew against GitHub)
+            dispatched_at = datetime.now(timezone.utc) - timedelta(seconds=5)
             result = workflow.create_dispatch(ref='main', inputs=inputs)
             
             logger.info(f"Triggered process workflow for: {process_name}")
             
-            # Get the latest run ID (this is approximate)
-            import time
-            time.sleep(2)  # Wait for workflow to start
-            
-            runs = workflow.get_runs()
-            latest_run = runs[0] if runs.totalCount > 0 else None
+            latest_run = self._find_dispatched_run(workflow, dispatched_at)
             
             return {
                 'success': True,
                 'workflow_name': workflow.name,
-                'run_id': latest_run.id if latest_run else None,
-                'run_url': latest_run.html_url if latest_run else None
+                'run_id': latest_run['id'] if latest_run else None,
+                'run_url': latest_run['html_url'] if latest_run else None
             }
             
         except Exception as e:
@@ -360,6 +571,45 @@ class GitHubClient:
             else:
                 raise
     
+    def _find_dispatched_run(self, workflow, dispatched_at):
+        """
+        Wait for the run created by a workflow dispatch.
+        
+        Args:
+            workflow: PyGithub Workflow that was dispatched
+            dispatched_at: UTC time just before the dispatch
+        
+        Returns:
+            The matching workflow run (REST JSON), else the latest run (or None)
+        """
+        # The dispatch has already been sent: a failed poll or an unparsable
+        # run must not turn it into an error (a retry would dispatch again)
+        runs_path = f'/actions/workflows/{workflow.id}/runs'
+        for delay in WORKFLOW_RUN_POLL_DELAYS:
+            time.sleep(delay)
+            try:
+                runs = self._get_json(
+                    runs_path, event='workflow_dispatch', branch='main', per_page=5
+                )['workflow_runs']
+            except (httpx.HTTPError, msgspec.DecodeError, KeyError) as e:
+                logger.warning(f"Error polling for dispatched workflow run: {e}")
+                continue
+            for run in runs:
+                try:
+                    created_at = _parse_timestamp(run['created_at'])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if created_at >= dispatched_at:
+                    return run
+        
+        logger.warning("Dispatched workflow run not found; using the latest run")
+        try:
+            runs = self._get_json(runs_path, per_page=1)['workflow_runs']
+        except (httpx.HTTPError, msgspec.DecodeError, KeyError) as e:
+            logger.warning(f"Error fetching the latest workflow run: {e}")
+            return None
+        return runs[0] if runs else None
+    
     def check_and_download_artifact(self, run_id, artifact_name='process-report'):
         """
         Check for workflow artifacts and download if available.
@@ -376,39 +626,34 @@ class GitHubClient:
             return {'success': False, 'error': 'GitHub repository not connected'}
         
         try:
-            import os
-            import requests
-            import zipfile
-            import io
-            
             # Get the workflow run
-            run = self.repo.get_workflow_run(run_id)
+            run = self._get_json(f'/actions/runs/{int(run_id)}')
+            status = run.get('status')
+            conclusion = run.get('conclusion')
             
             # Check run status
-            if run.status != 'completed':
+            if status != 'completed':
                 return {
                     'success': False,
-                    'status': run.status,
-                    'message': f'Workflow is {run.status}. Please wait for completion.'
+                    'status': status,
+                    'message': f'Workflow is {status}. Please wait for completion.'
                 }
             
             # Check if run was successful
-            if run.conclusion != 'success':
+            if conclusion != 'success':
                 return {
                     'success': False,
-                    'status': run.status,
-                    'conclusion': run.conclusion,
-                    'message': f'Workflow {run.conclusion}. No artifact available.'
+                    'status': status,
+                    'conclusion': conclusion,
+                    'message': f'Workflow {conclusion}. No artifact available.'
                 }
             
-            # Get artifacts
-            artifacts = run.get_artifacts()
-            
-            target_artifact = None
-            for artifact in artifacts:
-                if artifact.name == artifact_name:
-                    target_artifact = artifact
-                    break
+            # Get artifacts (filtered by name server-side)
+            artifacts = self._get_json(
+                f'/actions/runs/{int(run_id)}/artifacts',
+                name=artifact_name, per_page=1
+            )['artifacts']
+            target_artifact = artifacts[0] if artifacts else None
             
             if not target_artifact:
                 return {
@@ -417,46 +662,22 @@ class GitHubClient:
                 }
             
             # Download artifact
-            # Note: PyGithub doesn't directly support artifact download, need to use API
-            headers = {
-                'Authorization': f'token {self.token}',
-                'Accept': 'application/vnd.github.v3+json'
-            }
-            
-            download_url = target_artifact.archive_download_url
-            response = requests.get(download_url, headers=headers)
-            
-            if response.status_code != 200:
-                return {
-                    'success': False,
-                    'message': f'Failed to download artifact: HTTP {response.status_code}'
-                }
-            
-            # Extract zip file
-            os.makedirs('generated_reports', exist_ok=True)
-            
-            with zipfile.ZipFile(io.BytesIO(response.content)) as zip_ref:
-                # Extract all files from the artifact
-                for file_info in zip_ref.filelist:
-                    if file_info.filename.endswith('.docx'):
-                        # Extract to generated_reports folder
-                        zip_ref.extract(file_info.filename, 'generated_reports')
-                        extracted_filename = file_info.filename
-                        
-                        logger.info(f"Downloaded artifact: {extracted_filename}")
-                        
+            # Note: PyGithub doesn't directly support artifact download, need to use API.
+            # The shared client follows the redirect to blob storage (dropping
+            # the Authorization header on the cross-host hop).
+            download_url = target_artifact['archive_download_url']
+            with tempfile.SpooledTemporaryFile(max_size=ARTIFACT_SPOOL_SIZE) as spool:
+                with self._http.stream('GET', download_url, timeout=60.0) as response:
+                    if response.status_code != 200:
                         return {
-                            'success': True,
-                            'status': 'completed',
-                            'filename': extracted_filename,
-                            'download_url': f'/api/download/{extracted_filename}',
-                            'message': 'Artifact downloaded successfully'
+                            'success': False,
+                            'message': f'Failed to download artifact: HTTP {response.status_code}'
                         }
-            
-            return {
-                'success': False,
-                'message': 'No .docx file found in artifact'
-            }
+                    for chunk in response.iter_bytes(ARTIFACT_CHUNK_SIZE):
+                        spool.write(chunk)
+                spool.seek(0)
+                
+                return self._extract_report(spool)
             
         except Exception as e:
             logger.error(f"Error checking/downloading artifact: {e}")
@@ -465,6 +686,42 @@ class GitHubClient:
                 'error': str(e)
             }
     
+    def _extract_report(self, archive):
+        """
+        Extract the first .docx report from an artifact ZIP.
+        
+        Args:
+            archive: Seekable binary file holding the ZIP
+        
+        Returns:
+            Dictionary with status and download information
+        """
+        # Extract zip file (members are decompressed straight to disk)
+        os.makedirs('generated_reports', exist_ok=True)
+        
+        with zipfile.ZipFile(archive) as zip_ref:
+            # Extract all files from the artifact
+            for file_info in zip_ref.filelist:
+                if file_info.filename.endswith('.docx'):
+                    # Extract to generated_reports folder
+                    zip_ref.extract(file_info.filename, 'generated_reports')
+                    extracted_filename = file_info.filename
+                    
+                    logger.info(f"Downloaded artifact: {extracted_filename}")
+                    
+                    return {
+                        'success': True,
+                        'status': 'completed',
+                        'filename': extracted_filename,
+                        'download_url': f'/api/download/{extracted_filename}',
+                        'message': 'Artifact downloaded successfully'
+                    }
+        
+        return {
+            'success': False,
+            'message': 'No .docx file found in artifact'
+        }
+    
     # Backward compatibility alias
     def trigger_sox_workflow(self, control_name, control_data, analysis_type='standard'):
         """Legacy function for backward compatibility. Calls trigger_process_workflow."""
@@ -0,0 +1,52 @@
+"""
+Gunicorn configuration for production.
+Run with: gunicorn app:app -c gunicorn.conf.py
+"""
+import os
+
+# Server socket
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Worker processes
+# gevent multiplexes many concurrent requests per worker, since most of the
+# time is spent waiting on Gemini, GitHub and ChromaDB; set
+# GUNICORN_WORKER_CLASS=gthread to use OS threads instead.
+#
+# Workers default to 1: each process keeps its own ChromaDB HNSW index,
+# chat caches and report jobs, so an upload or report job handled by one
+# worker is invisible to the others. Raise GUNICORN_WORKERS only behind
+# sticky sessions. The app is deliberately not preloaded: ChromaDB's
+# SQLite connection and the gRPC channel must not be shared across fork.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.getenv('GUNICORN_WORKERS', '1'))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))  # gthread only
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '500'))
+keepalive = 5
+
+# Report downloads are served through wsgi.file_wrapper, which gunicorn
+# hands to sendfile(2): the file goes from the page cache to the socket
+# without being copied through Python. Disable on filesystems where
+# sendfile misbehaves (e.g. some VM shared folders).
+sendfile = os.getenv('GUNICORN_SENDFILE', 'true').lower() == 'true'
+
+# Chat streams and report generation can legitimately run for a while
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+
+# Logging
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+
+def post_fork(server, worker):
+    """Make gRPC (used by the Gemini SDK) cooperate with gevent workers."""
+    # Only gevent workers are monkey-patched; initializing grpc's gevent
+    # integration in a gthread/sync worker can hang grpc calls
+    if not worker.__class__.__module__.startswith('gunicorn.workers.ggevent'):
+        return
+    try:
+        from grpc.experimental import gevent as grpc_gevent
+        grpc_gevent.init_gevent()
+    except ImportError:
+        pass
@@ -0,0 +1,71 @@
+"""
+orjson-backed JSON provider for Flask.
+Replaces the stdlib json used by jsonify and request.get_json, and builds
+jsonify responses straight from orjson's bytes.
+"""
+import decimal
+import orjson
+from flask.json.provider import JSONProvider
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj):
+    """Serialize types orjson doesn't handle natively."""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider using orjson for serialization and parsing."""
+
+    def dumps(self, obj, **kwargs):
+        """
+        Serialize data as a JSON string.
+
+        Args:
+            obj: Data to serialize
+            **kwargs: Ignored (stdlib json options don't apply to orjson)
+
+        Returns:
+            JSON string
+        """
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS).decode()
+
+    def response(self, *args, **kwargs):
+        """
+        Build a JSON response (what jsonify returns) from orjson bytes.
+
+        Skips the str round trip of the base implementation, which would
+        decode orjson's output only for Werkzeug to encode it again.
+
+        Args:
+            *args: Single object or positional items (as for jsonify)
+            **kwargs: Keyword items (as for jsonify)
+
+        Returns:
+            Response with an application/json body
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS),
+            mimetype='application/json'
+        )
+
+    def loads(self, s, **kwargs):
+        """
+        Deserialize JSON data.
+
+        Args:
+            s: JSON text (str or bytes)
+            **kwargs: Ignored
+
+        Returns:
+            Deserialized data
+        """
+        return orjson.loads(s)
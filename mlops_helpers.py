@@ -7,14 +7,57 @@ import json
 from typing import Dict, List, Optional, Union
 from logger import logger
 
+# Fastest available JSON implementation, picked once at import: orjson
+# ships with the app, the stdlib fallback keeps this module usable on its
+# own. orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers
+# catch the latter either way.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
-def parse_ml_metrics(metrics_json: Union[str, Dict]) -> Dict:
+# Standard metrics in document order, with their display labels
+METRIC_ORDER = (
+    'accuracy', 'precision', 'recall', 'f1_score', 'auc_roc',
+    'loss', 'mae', 'rmse', 'r2_score'
+)
+_METRIC_LABELS = {key: key.replace('_', ' ').title() for key in METRIC_ORDER}
+
+# Accepted input names for each standard metric, in lookup priority order
+# (kept lowercase: they double as keys into the lowercased input index)
+_METRIC_ALIASES = {
+    'accuracy': ('accuracy', 'acc', 'accuracy_score'),
+    'precision': ('precision', 'prec', 'precision_score'),
+    'recall': ('recall', 'rec', 'recall_score', 'sensitivity'),
+    'f1_score': ('f1_score', 'f1', 'f1-score'),
+    'auc_roc': ('auc_roc', 'auc', 'roc_auc', 'auc_score'),
+    'loss': ('loss', 'training_loss', 'val_loss'),
+    'mae': ('mae', 'mean_absolute_error'),
+    'rmse': ('rmse', 'root_mean_squared_error'),
+    'r2_score': ('r2_score', 'r2', 'r_squared'),
+}
+
+# Standard metrics with no value (copied, never handed out directly)
+_DEFAULT_METRICS = dict.fromkeys(METRIC_ORDER, 'N/A')
+
+# Custom metric names are normalized to snake_case
+_KEY_SEPARATORS = str.maketrans('- ', '__')
+
+# Default weights for the overall model score
+_DEFAULT_SCORE_WEIGHTS = {'accuracy': 0.4, 'precision': 0.2, 'recall': 0.2, 'f1_score': 0.2}
+
+# (minimum accuracy, label) bands for metric summaries, best first
+_ACCURACY_BANDS = ((0.95, 'Excellent'), (0.90, 'Good'), (0.85, 'Acceptable'))
+
+
+def parse_ml_metrics(metrics_json: Union[str, bytes, Dict]) -> Dict:
     """
     Parse ML metrics from JSON string or dict - standalone function.
     No dependencies on app.py, gemini_client, or github_client.
     
     Args:
-        metrics_json: JSON string or dict containing ML metrics
+        metrics_json: JSON string/bytes or dict containing ML metrics
         
     Returns:
         Dict with standardized metric names and values
@@ -24,33 +67,42 @@ def parse_ml_metrics(metrics_json: Union[str, Dict]) -> Dict:
         {'accuracy': 0.95, 'f1_score': 0.93, 'precision': 'N/A', 'recall': 'N/A', 'loss': 'N/A'}
     """
     try:
-        # Convert string to dict if needed
-        if isinstance(metrics_json, str):
-            metrics = json.loads(metrics_json)
+        # Convert string to dict if needed (bytes are parsed without a str
+        # round trip, so raw request bodies can be passed as-is)
+        if isinstance(metrics_json, (str, bytes)):
+            metrics = _json_loads(metrics_json)
         elif isinstance(metrics_json, dict):
             metrics = metrics_json
         else:
             logger.warning(f"Invalid metrics type: {type(metrics_json)}")
             return _get_default_metrics()
         
-        # Standardize metric names and extract values
-        standardized = {
-            'accuracy': _get_metric(metrics, ['accuracy', 'acc', 'accuracy_score']),
-            'precision': _get_metric(metrics, ['precision', 'prec', 'precision_score']),
-            'recall': _get_metric(metrics, ['recall', 'rec', 'recall_score', 'sensitivity']),
-            'f1_score': _get_metric(metrics, ['f1_score', 'f1', 'f1-score']),
-            'auc_roc': _get_metric(metrics, ['auc_roc', 'auc', 'roc_auc', 'auc_score']),
-            'loss': _get_metric(metrics, ['loss', 'training_loss', 'val_loss']),
-            'mae': _get_metric(metrics, ['mae', 'mean_absolute_error']),
-            'rmse': _get_metric(metrics, ['rmse', 'root_mean_squared_error']),
-            'r2_score': _get_metric(metrics, ['r2_score', 'r2', 'r_squared']),
-        }
-        
-        # Add any custom metrics not in the standard set
+        # Lowercased key -> value (first spelling wins) for case-insensitive lookups
+        lower_index = {}
         for key, value in metrics.items():
-            standardized_key = key.lower().replace('-', '_').replace(' ', '_')
-            if standardized_key not in standardized:
-                standardized[standardized_key] = value
+            lower_index.setdefault(key.lower(), value)
+        
+        # Standardize metric names and extract values: per alias, an exact
+        # key wins, then a case-insensitive one (aliases are lowercase)
+        standardized = {}
+        for name, aliases in _METRIC_ALIASES.items():
+            for alias in aliases:
+                if alias in metrics:
+                    standardized[name] = metrics[alias]
+                    break
+                if alias in lower_index:
+                    standardized[name] = lower_index[alias]
+                    break
+            else:
+                standardized[name] = 'N/A'
+        
+        # Add any custom metrics not in the standard set (nothing to do when
+        # every input key is already a standard name)
+        if not lower_index.keys() <= _DEFAULT_METRICS.keys():
+            for key, value in lower_index.items():
+                standardized_key = key.translate(_KEY_SEPARATORS)
+                if standardized_key not in standardized:
+                    standardized[standardized_key] = value
         
         logger.info(f"Parsed {len(standardized)} metrics from input")
         return standardized
@@ -60,40 +112,9 @@ def parse_ml_metrics(metrics_json: Union[str, Dict]) -> Dict:
         return _get_default_metrics()
 
 
-def _get_metric(metrics: Dict, possible_keys: List[str]) -> Union[float, str]:
-    """
-    Get metric value from dict using multiple possible key names.
-    
-    Args:
-        metrics: Dictionary of metrics
-        possible_keys: List of possible key names to check
-        
-    Returns:
-        Metric value or 'N/A' if not found
-    """
-    for key in possible_keys:
-        if key in metrics:
-            return metrics[key]
-        # Try case-insensitive match
-        for k, v in metrics.items():
-            if k.lower() == key.lower():
-                return v
-    return 'N/A'
-
-
 def _get_default_metrics() -> Dict:
     """Return default metrics structure with N/A values."""
-    return {
-        'accuracy': 'N/A',
-        'precision': 'N/A',
-        'recall': 'N/A',
-        'f1_score': 'N/A',
-        'auc_roc': 'N/A',
-        'loss': 'N/A',
-        'mae': 'N/A',
-        'rmse': 'N/A',
-        'r2_score': 'N/A',
-    }
+    return _DEFAULT_METRICS.copy()
 
 
 def format_ml_metrics_for_document(metrics: Dict) -> str:
@@ -120,34 +141,26 @@ def format_ml_metrics_for_document(metrics: Dict) -> str:
     
     lines = ["**Model Performance Metrics:**\n"]
     
-    # Order metrics for better readability
-    metric_order = [
-        'accuracy', 'precision', 'recall', 'f1_score', 'auc_roc',
-        'loss', 'mae', 'rmse', 'r2_score'
-    ]
-    
-    # Add ordered metrics first
-    for key in metric_order:
+    # Add ordered metrics first (labels are precomputed)
+    for key in METRIC_ORDER:
         if key in metrics and metrics[key] != 'N/A':
-            value = metrics[key]
-            label = key.replace('_', ' ').title()
-            if isinstance(value, (int, float)):
-                lines.append(f"• {label}: {value:.4f}")
-            else:
-                lines.append(f"• {label}: {value}")
+            lines.append(_format_metric_line(_METRIC_LABELS[key], metrics[key]))
     
     # Add any custom metrics not in the ordered list
     for key, value in metrics.items():
-        if key not in metric_order:
-            label = key.replace('_', ' ').title()
-            if isinstance(value, (int, float)):
-                lines.append(f"• {label}: {value:.4f}")
-            else:
-                lines.append(f"• {label}: {value}")
+        if key not in _METRIC_LABELS:
+            lines.append(_format_metric_line(key.replace('_', ' ').title(), value))
     
     return '\n'.join(lines)
 
 
+def _format_metric_line(label: str, value) -> str:
+    """Format one bullet line of the metrics section."""
+    if isinstance(value, (int, float)):
+        return f"• {label}: {value:.4f}"
+    return f"• {label}: {value}"
+
+
 def validate_metrics_schema(metrics: Dict, required_metrics: Optional[List[str]] = None) -> tuple[bool, List[str]]:
     """
     Validate that metrics dict contains required fields.
@@ -198,21 +211,20 @@ def calculate_model_score(metrics: Dict, weights: Optional[Dict[str, float]] = N
     """
     if weights is None:
         # Default equal weights for available metrics
-        weights = {'accuracy': 0.4, 'precision': 0.2, 'recall': 0.2, 'f1_score': 0.2}
+        weights = _DEFAULT_SCORE_WEIGHTS
     
     try:
-        score = 0.0
-        total_weight = 0.0
-        
-        for metric_name, weight in weights.items():
-            if metric_name in metrics and metrics[metric_name] != 'N/A':
-                value = float(metrics[metric_name])
-                score += value * weight
-                total_weight += weight
+        # (weight, value) for each weighted metric that is present
+        pairs = [
+            (weight, float(value))
+            for metric_name, weight in weights.items()
+            if (value := metrics.get(metric_name, 'N/A')) != 'N/A'
+        ]
+        total_weight = sum(weight for weight, _ in pairs)
         
         # Normalize by actual total weight used
         if total_weight > 0:
-            return score / total_weight
+            return sum(weight * value for weight, value in pairs) / total_weight
         else:
             return 0.0
             
@@ -235,32 +247,25 @@ def get_metrics_summary(metrics: Dict) -> str:
         return "No performance metrics available."
     
     summary_parts = []
+    acc = _numeric_metric(metrics.get('accuracy'))
+    f1 = _numeric_metric(metrics.get('f1_score'))
+    prec = _numeric_metric(metrics.get('precision'))
+    rec = _numeric_metric(metrics.get('recall'))
     
     # Check accuracy
-    if 'accuracy' in metrics and metrics['accuracy'] != 'N/A':
-        acc = float(metrics['accuracy'])
-        if acc >= 0.95:
-            summary_parts.append(f"Excellent accuracy ({acc:.2%})")
-        elif acc >= 0.90:
-            summary_parts.append(f"Good accuracy ({acc:.2%})")
-        elif acc >= 0.85:
-            summary_parts.append(f"Acceptable accuracy ({acc:.2%})")
-        else:
-            summary_parts.append(f"Low accuracy ({acc:.2%})")
+    if acc is not None:
+        band = next((label for threshold, label in _ACCURACY_BANDS if acc >= threshold), 'Low')
+        summary_parts.append(f"{band} accuracy ({acc:.2%})")
     
     # Check F1 score
-    if 'f1_score' in metrics and metrics['f1_score'] != 'N/A':
-        f1 = float(metrics['f1_score'])
+    if f1 is not None:
         if f1 >= 0.90:
             summary_parts.append(f"strong F1 score ({f1:.3f})")
         elif f1 >= 0.80:
             summary_parts.append(f"moderate F1 score ({f1:.3f})")
     
     # Check precision and recall balance
-    if ('precision' in metrics and metrics['precision'] != 'N/A' and
-        'recall' in metrics and metrics['recall'] != 'N/A'):
-        prec = float(metrics['precision'])
-        rec = float(metrics['recall'])
+    if prec is not None and rec is not None:
         diff = abs(prec - rec)
         if diff < 0.05:
             summary_parts.append("well-balanced precision and recall")
@@ -275,6 +280,16 @@ def get_metrics_summary(metrics: Dict) -> str:
         return "Model performance metrics available."
 
 
+def _numeric_metric(value) -> Optional[float]:
+    """Return a metric value as float, or None if missing or non-numeric."""
+    if value is None or value == 'N/A':
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
 def export_metrics_to_mlflow_format(metrics: Dict, run_name: str = "model_run") -> Dict:
     """
     Convert metrics to MLflow-compatible format.
@@ -301,6 +316,37 @@ def export_metrics_to_mlflow_format(metrics: Dict, run_name: str = "model_run")
     return mlflow_metrics
 
 
+def process_metrics(metrics_json: Union[str, bytes, Dict],
+                    required_metrics: Optional[List[str]] = None,
+                    weights: Optional[Dict[str, float]] = None) -> Dict:
+    """
+    Parse metrics once and derive everything the MLOps endpoints report.
+    
+    The payload is decoded and standardized a single time; formatting,
+    summary, validation and scoring all work from that one standardized
+    dict instead of each re-parsing or re-walking the raw input.
+    
+    Args:
+        metrics_json: JSON string/bytes or dict containing ML metrics
+        required_metrics: Required metric names (defaults to accuracy)
+        weights: Optional dict of metric weights for the overall score
+        
+    Returns:
+        Dict with parsed_metrics, formatted_text, summary, valid,
+        missing_metrics and overall_score
+    """
+    parsed = parse_ml_metrics(metrics_json)
+    is_valid, missing = validate_metrics_schema(parsed, required_metrics)
+    return {
+        'parsed_metrics': parsed,
+        'formatted_text': format_ml_metrics_for_document(parsed),
+        'summary': get_metrics_summary(parsed),
+        'valid': is_valid,
+        'missing_metrics': missing,
+        'overall_score': calculate_model_score(parsed, weights)
+    }
+
+
 # NO imports from app.py, gemini_client, github_client, rag_engine
 # NO modifications to existing code required
 # Optional: only loaded if MLOps features are used
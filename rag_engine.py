@@ -3,7 +3,15 @@ RAG (Retrieval-Augmented Generation) Engine using ChromaDB.
 Handles document processing, embedding generation, and context retrieval.
 """
 import os
+import hashlib
+import shutil
+import tempfile
+import threading
+from typing import Optional
 import chromadb
+import msgspec
+import numpy as np
+from cachetools import LRUCache, TTLCache, cachedmethod
 from chromadb.config import Settings
 import google.generativeai as genai
 from docx import Document
@@ -11,11 +19,56 @@ from PyPDF2 import PdfReader
 from logger import logger
 from config import Config
 
+# Buffer size for spooling non-seekable upload streams (page aligned)
+STREAM_COPY_BUFFER = 4096 if os.name != 'nt' else 8192
+
+# Gemini batchEmbedContents accepts at most 100 texts per request
+EMBED_BATCH_SIZE = 100
+
+# Chunk embeddings kept in memory, keyed by SHA-256 of the chunk text, so
+# re-uploads and lightly edited documents reuse vectors. Stored as float32
+# arrays (~3 KB per 768-d vector vs ~25 KB as a list of Python floats);
+# ChromaDB's index stores float32 too, so nothing is lost.
+EMBEDDING_CACHE_SIZE = 10000
+
+# ChromaDB collection settings. Chroma already searches with an hnswlib
+# index; these tune it (cosine space, denser graph, wider search beam).
+# They only take effect when the collection is created, i.e. on a fresh
+# database or after clear_database().
+COLLECTION_NAME = "rag_documents"
+COLLECTION_METADATA = {
+    "description": "RAG document embeddings",
+    "hnsw:space": "cosine",
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64
+}
+
+# Seconds get_stats() results are reused (health checks and dashboards poll it)
+STATS_CACHE_TTL = 2
+
+
+class RagChunk(msgspec.Struct, frozen=True):
+    """Retrieved document chunk (slotted, immutable, safe to share in caches)."""
+    text: str
+    filename: str
+    chunk_index: int
+    distance: Optional[float] = None
+
+
 class RAGEngine:
     """RAG engine for document processing and retrieval."""
     
     def __init__(self):
         """Initialize the RAG engine with ChromaDB and Gemini embeddings."""
+        self._stats_cache = TTLCache(maxsize=1, ttl=STATS_CACHE_TTL)
+        self._stats_lock = threading.Lock()
+        self._embedding_cache = LRUCache(maxsize=EMBEDDING_CACHE_SIZE)
+        self._embedding_lock = threading.Lock()
+        # Bumped whenever the collection changes, so callers can tell
+        # whether results they derived from it are still current
+        self.corpus_version = 0
+        
         try:
             # Initialize ChromaDB
             self.client = chromadb.PersistentClient(
@@ -25,8 +78,8 @@ class RAGEngine:
             
             # Get or create collection
             self.collection = self.client.get_or_create_collection(
-                name="rag_documents",
-                metadata={"description": "RAG document embeddings"}
+                name=COLLECTION_NAME,
+                metadata=COLLECTION_METADATA
             )
             
             # Configure Gemini for embeddings
@@ -38,12 +91,12 @@ class RAGEngine:
             logger.error(f"Failed to initialize RAG Engine: {e}")
             raise
     
-    def extract_text(self, file_path, file_type):
+    def extract_text(self, source, file_type):
         """
         Extract text content from uploaded file.
         
         Args:
-            file_path: Path to the file
+            source: Path to the file or a binary file-like object
             file_type: File extension (txt, pdf, docx)
         
         Returns:
@@ -51,18 +104,20 @@ class RAGEngine:
         """
         try:
             if file_type == 'txt':
-                with open(file_path, 'r', encoding='utf-8') as f:
+                if hasattr(source, 'read'):
+                    return source.read().decode('utf-8')
+                with open(source, 'r', encoding='utf-8') as f:
                     return f.read()
             
             elif file_type == 'pdf':
-                reader = PdfReader(file_path)
+                reader = PdfReader(source)
                 text = ""
                 for page in reader.pages:
                     text += page.extract_text() + "\n"
                 return text
             
             elif file_type == 'docx':
-                doc = Document(file_path)
+                doc = Document(source)
                 text = ""
                 for paragraph in doc.paragraphs:
                     text += paragraph.text + "\n"
@@ -72,7 +127,7 @@ class RAGEngine:
                 raise ValueError(f"Unsupported file type: {file_type}")
                 
         except Exception as e:
-            logger.error(f"Error extracting text from {file_path}: {e}")
+            logger.error(f"Error extracting text from {getattr(source, 'name', source)}: {e}")
             raise
     
     def chunk_text(self, text, chunk_size=None, overlap=None):
@@ -135,13 +190,106 @@ class RAGEngine:
             logger.error(f"Error generating embedding: {e}")
             raise
     
-    def add_document(self, file_path, filename):
+    def generate_embeddings(self, texts):
+        """
+        Generate document embeddings for many texts with batched requests.
+        
+        Texts seen before (by SHA-256) are served from memory; the rest
+        are embedded EMBED_BATCH_SIZE at a time.
+        
+        Args:
+            texts: List of texts to embed
+        
+        Returns:
+            List of embedding vectors, aligned with texts
+        """
+        keys = [hashlib.sha256(text.encode('utf-8')).hexdigest() for text in texts]
+        embeddings = [None] * len(texts)
+        
+        with self._embedding_lock:
+            for i, key in enumerate(keys):
+                cached = self._embedding_cache.get(key)
+                if cached is not None:
+                    embeddings[i] = cached.tolist()
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if len(missing) < len(texts):
+            logger.info(f"Reusing {len(texts) - len(missing)} cached chunk embeddings")
+        
+        try:
+            for start in range(0, len(missing), EMBED_BATCH_SIZE):
+                batch = missing[start:start + EMBED_BATCH_SIZE]
+                result = genai.embed_content(
+                    model=Config.GEMINI_EMBEDDING_MODEL,
+                    content=[texts[i] for i in batch],
+                    task_type="retrieval_document"
+                )
+                with self._embedding_lock:
+                    for i, embedding in zip(batch, result['embedding']):
+                        embeddings[i] = embedding
+                        self._embedding_cache[keys[i]] = np.asarray(
+                            embedding, dtype=np.float32
+                        )
+        except Exception as e:
+            logger.error(f"Error generating batch embeddings: {e}")
+            raise
+        
+        return embeddings
+    
+    def add_documents_batch(self, chunks, metadatas, ids):
+        """
+        Embed chunks and add them to ChromaDB one embedding batch at a time.
+        
+        Each EMBED_BATCH_SIZE window is embedded (one API call) and inserted
+        before the next, so only one window of vectors is held in memory
+        rather than every vector of the document. If a window fails, the
+        chunks this call inserted are removed so the document is added whole
+        or not at all; ids that were already stored (e.g. from an earlier
+        upload of the same file) are never deleted by the rollback.
+        
+        Args:
+            chunks: List of chunk texts
+            metadatas: List of metadata dicts, aligned with chunks
+            ids: List of chunk ids, aligned with chunks
+        
+        Returns:
+            Number of chunks added
+        """
+        if not chunks:
+            return 0
+        
+        # Ids derive from filename and chunk index, so a re-upload can reuse
+        # stored ids; only ids created here may be rolled back
+        existing = set(self.collection.get(ids=ids, include=[])['ids'])
+        
+        added = 0
+        try:
+            for start in range(0, len(chunks), EMBED_BATCH_SIZE):
+                end = start + EMBED_BATCH_SIZE
+                self.collection.add(
+                    documents=chunks[start:end],
+                    metadatas=metadatas[start:end],
+                    ids=ids[start:end],
+                    embeddings=self.generate_embeddings(chunks[start:end])
+                )
+                added = min(end, len(chunks))
+        except Exception:
+            created = [chunk_id for chunk_id in ids[:added] if chunk_id not in existing]
+            if created:
+                self.collection.delete(ids=created)
+            raise
+        finally:
+            self._collection_changed()
+        
+        return len(chunks)
+    
+    def add_document(self, source, filename):
         """
         Process and add document to ChromaDB.
         
         Args:
-            file_path: Path to the uploaded file
-            filename: Original filename
+            source: Path to the uploaded file or a binary file-like object
+            filename: Original filename (used to pick the text extractor)
         
         Returns:
             Number of chunks added
@@ -152,7 +300,7 @@ class RAGEngine:
             
             # Extract text
             logger.info(f"Extracting text from {filename}")
-            text = self.extract_text(file_path, file_type)
+            text = self.extract_text(source, file_type)
             
             if not text.strip():
                 raise ValueError("No text content found in document")
@@ -162,34 +310,17 @@ class RAGEngine:
             chunks = self.chunk_text(text)
             logger.info(f"Created {len(chunks)} chunks from {filename}")
             
-            # Generate embeddings and add to ChromaDB
-            documents = []
-            metadatas = []
-            ids = []
-            embeddings = []
-            
-            for i, chunk in enumerate(chunks):
-                chunk_id = f"{filename}_chunk_{i}"
-                
-                # Generate embedding
-                embedding = self.generate_embedding(chunk)
-                
-                documents.append(chunk)
-                metadatas.append({
+            # Generate embeddings and add to ChromaDB in one batch
+            metadatas = [
+                {
                     "filename": filename,
                     "chunk_index": i,
                     "total_chunks": len(chunks)
-                })
-                ids.append(chunk_id)
-                embeddings.append(embedding)
-            
-            # Add to collection
-            self.collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids,
-                embeddings=embeddings
-            )
+                }
+                for i in range(len(chunks))
+            ]
+            ids = [f"{filename}_chunk_{i}" for i in range(len(chunks))]
+            self.add_documents_batch(chunks, metadatas, ids)
             
             logger.info(f"Successfully added {len(chunks)} chunks from {filename} to RAG database")
             return len(chunks)
@@ -198,43 +329,91 @@ class RAGEngine:
             logger.error(f"Error adding document {filename}: {e}")
             raise
     
-    def retrieve_context(self, query, top_k=None):
+    def add_document_stream(self, stream, filename):
         """
-        Retrieve relevant context for a query.
+        Process and add a document read directly from a binary stream.
         
+        Avoids writing uploads to disk only to read them straight back.
+        
+        Args:
+            stream: Binary file-like object (e.g. Werkzeug upload stream)
+            filename: Original filename
+        
+        Returns:
+            Number of chunks added
+        """
+        # PDF and DOCX readers seek; spool one-pass streams in fixed-size
+        # chunks (in memory up to the upload limit) rather than one read()
+        seekable = getattr(stream, 'seekable', lambda: False)()
+        if not seekable:
+            with tempfile.SpooledTemporaryFile(
+                max_size=Config.MAX_CONTENT_LENGTH
+            ) as spool:
+                shutil.copyfileobj(stream, spool, length=STREAM_COPY_BUFFER)
+                spool.seek(0)
+                return self.add_document(spool, filename)
+        
+        stream.seek(0)
+        return self.add_document(stream, filename)
+    
+    def embed_query(self, query):
+        """
+        Generate a retrieval-query embedding for a user query.
+
+        Args:
+            query: User query
+
+        Returns:
+            Embedding vector
+        """
+        return genai.embed_content(
+            model=Config.GEMINI_EMBEDDING_MODEL,
+            content=query,
+            task_type="retrieval_query"
+        )['embedding']
+
+    def embed_batch(self, texts):
+        """
+        Generate retrieval-query embeddings for several texts in one call.
+
+        Args:
+            texts: List of query strings
+
+        Returns:
+            List of embedding vectors, aligned with texts
+        """
+        return genai.embed_content(
+            model=Config.GEMINI_EMBEDDING_MODEL,
+            content=list(texts),
+            task_type="retrieval_query"
+        )['embedding']
+
+    def retrieve_context(self, query, top_k=None, query_embedding=None):
+        """
+        Retrieve relevant context for a query.
+
         Args:
             query: User query
             top_k: Number of results to retrieve
-        
+            query_embedding: Precomputed query embedding (optional)
+
         Returns:
-            List of relevant text chunks with metadata
+            List of RagChunk structs, most relevant first
         """
         try:
             top_k = top_k or Config.TOP_K_RESULTS
-            
+
             # Generate query embedding
-            query_embedding = genai.embed_content(
-                model=Config.GEMINI_EMBEDDING_MODEL,
-                content=query,
-                task_type="retrieval_query"
-            )['embedding']
-            
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
+
             # Query ChromaDB
             results = self.collection.query(
                 query_embeddings=[query_embedding],
                 n_results=top_k
             )
             
-            # Format results
-            context_chunks = []
-            if results and results['documents']:
-                for i, doc in enumerate(results['documents'][0]):
-                    metadata = results['metadatas'][0][i] if results['metadatas'] else {}
-                    context_chunks.append({
-                        'text': doc,
-                        'metadata': metadata,
-                        'distance': results['distances'][0][i] if results['distances'] else None
-                    })
+            context_chunks = self._format_results(results, 0)
             
             logger.info(f"Retrieved {len(context_chunks)} context chunks for query")
             return context_chunks
@@ -243,8 +422,71 @@ class RAGEngine:
             logger.error(f"Error retrieving context: {e}")
             return []
     
+    def retrieve_context_batch(self, queries, top_k=None, query_embeddings=None):
+        """
+        Retrieve context for several queries with one embedding call and
+        one ChromaDB query.
+
+        Args:
+            queries: List of user queries
+            top_k: Number of results to retrieve per query
+            query_embeddings: Precomputed embeddings aligned with queries (optional)
+
+        Returns:
+            List of RagChunk lists, aligned with queries
+        """
+        if not queries:
+            return []
+        
+        try:
+            top_k = top_k or Config.TOP_K_RESULTS
+
+            if query_embeddings is None:
+                query_embeddings = self.embed_batch(queries)
+
+            results = self.collection.query(
+                query_embeddings=list(query_embeddings),
+                n_results=top_k
+            )
+            
+            contexts = [
+                self._format_results(results, i) for i in range(len(queries))
+            ]
+            
+            logger.info(f"Retrieved context for {len(queries)} queries in one batch")
+            return contexts
+            
+        except Exception as e:
+            logger.error(f"Error retrieving batch context: {e}")
+            return [[] for _ in queries]
+    
+    def _format_results(self, results, query_index):
+        """
+        Convert one query's rows of a ChromaDB result into context chunks.
+
+        Args:
+            results: Result of collection.query
+            query_index: Index of the query within the result
+
+        Returns:
+            List of RagChunk structs
+        """
+        context_chunks = []
+        if results and results['documents']:
+            i = query_index
+            for j, doc in enumerate(results['documents'][i]):
+                metadata = results['metadatas'][i][j] if results['metadatas'] else {}
+                context_chunks.append(RagChunk(
+                    text=doc,
+                    filename=metadata.get('filename', 'Unknown'),
+                    chunk_index=metadata.get('chunk_index', -1),
+                    distance=results['distances'][i][j] if results['distances'] else None
+                ))
+        return context_chunks
+    
+    @cachedmethod(lambda self: self._stats_cache, lock=lambda self: self._stats_lock)
     def get_stats(self):
-        """Get statistics about the RAG database."""
+        """Get statistics about the RAG database (cached briefly)."""
         try:
             count = self.collection.count()
             return {
@@ -255,15 +497,22 @@ class RAGEngine:
             logger.error(f"Error getting stats: {e}")
             return {'total_chunks': 0}
     
+    def _collection_changed(self):
+        """Drop cached stats and bump the corpus version."""
+        with self._stats_lock:
+            self._stats_cache.clear()
+            self.corpus_version += 1
+    
     def clear_database(self):
         """Clear all documents from the RAG database."""
         try:
             # Delete and recreate collection
-            self.client.delete_collection("rag_documents")
+            self.client.delete_collection(COLLECTION_NAME)
             self.collection = self.client.get_or_create_collection(
-                name="rag_documents",
-                metadata={"description": "RAG document embeddings"}
+                name=COLLECTION_NAME,
+                metadata=COLLECTION_METADATA
             )
+            self._collection_changed()
             logger.info("RAG database cleared successfully")
             return True
         except Exception as e:
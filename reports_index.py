@@ -0,0 +1,115 @@
+"""
+In-memory index of generated Word reports.
+Holds per-file metadata for generated_reports/ so listings are served from
+RAM instead of stat-ing every file on each request. Reports the app writes
+or deletes update the index directly; a coarse periodic rescan picks up
+files changed behind its back.
+"""
+import os
+import threading
+import time
+from logger import logger
+
+REPORTS_DIR = 'generated_reports'
+RESCAN_INTERVAL = 60  # Seconds
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _report_entry(filename, stat):
+    """Build the (mtime, listing entry) pair for one report."""
+    return stat.st_mtime, {
+        'filename': filename,
+        'size': stat.st_size,
+        'created': time.strftime(TIME_FORMAT, time.localtime(stat.st_ctime)),
+        'modified': time.strftime(TIME_FORMAT, time.localtime(stat.st_mtime))
+    }
+
+
+class ReportsIndex:
+    """Filename -> metadata index of the generated reports directory."""
+
+    def __init__(self, reports_dir=REPORTS_DIR, rescan_interval=RESCAN_INTERVAL):
+        """
+        Initialize the index (empty until the first scan).
+
+        Args:
+            reports_dir: Directory holding the generated .docx reports
+            rescan_interval: Seconds before a listing triggers a full rescan
+        """
+        self.reports_dir = reports_dir
+        self.rescan_interval = rescan_interval
+
+        self._lock = threading.RLock()
+        # filename -> (mtime, listing entry)
+        self._reports = {}
+        # Sorted listing, rebuilt lazily after the index changes
+        self._listing = None
+        self._scanned_at = None
+
+    def scan(self):
+        """
+        Rebuild the index with one directory scan.
+
+        Returns:
+            Number of indexed reports
+        """
+        reports = {}
+        try:
+            with os.scandir(self.reports_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.docx') and entry.is_file():
+                        reports[entry.name] = _report_entry(entry.name, entry.stat())
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error scanning generated reports: {e}")
+
+        with self._lock:
+            self._reports = reports
+            self._listing = None
+            self._scanned_at = time.monotonic()
+        return len(reports)
+
+    def add(self, filename):
+        """
+        Index a report that was just written.
+
+        Args:
+            filename: Report file name inside the reports directory
+        """
+        try:
+            stat = os.stat(os.path.join(self.reports_dir, filename))
+        except OSError:
+            self.discard(filename)
+            return
+
+        with self._lock:
+            self._reports[filename] = _report_entry(filename, stat)
+            self._listing = None
+
+    def discard(self, filename):
+        """Drop a report from the index if present."""
+        with self._lock:
+            if self._reports.pop(filename, None) is not None:
+                self._listing = None
+
+    def listing(self):
+        """
+        Return the report listing, newest first.
+
+        Returns:
+            List of dictionaries with file information
+        """
+        with self._lock:
+            if (self._scanned_at is None or
+                    time.monotonic() - self._scanned_at >= self.rescan_interval):
+                self.scan()
+
+            if self._listing is None:
+                ordered = sorted(
+                    self._reports.values(),
+                    key=lambda item: item[0],
+                    reverse=True
+                )
+                self._listing = [entry for _, entry in ordered]
+            return self._listing
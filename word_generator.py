@@ -5,19 +5,115 @@ Generates professionally formatted .docx files with structured sections.
 from docx import Document
 from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
 from datetime import datetime
+from functools import lru_cache
+import io
 import os
 import re
+import threading
+import time
 import json
 from logger import logger
 from config import Config
 
 # Load document templates
 DOCUMENT_TEMPLATES = {}
+# Compiled section-header regex per template type, rebuilt by load_templates()
+SECTION_PATTERNS = {}
+
+# List detection for section content
+_NUMBERED_LINE = re.compile(r'\n\d+\.')
+_NUMBERED_PREFIX = re.compile(r'^\d+\.\s*')
+
+# Characters stripped from process names in report filenames: anything but
+# word characters, whitespace and '-'. ASCII names (the common case) go
+# through a str.translate deletion table; others fall back to the regex.
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\s-]')
+_UNSAFE_ASCII_TABLE = str.maketrans('', '', ''.join(
+    ch for ch in map(chr, range(128))
+    if not (ch.isalnum() or ch.isspace() or ch in '_-')
+))
+
+# Serialized base document (styles and footer shared by every report),
+# built on first use
+_base_document_bytes = None
+_base_document_lock = threading.Lock()
+
+
+def _compile_section_pattern(template):
+    """
+    Compile one regex matching every section header of a template.
+    
+    Each header ("2. Key Components:") is a named alternative, so a single
+    scan of the text finds all of them. Headers must start a line,
+    optionally behind markdown markers ('## ', '**'); a closing '**' after
+    the title is dropped too. Anchoring also ignores "1. Overview" quoted
+    mid-sentence.
+    
+    Args:
+        template (dict): Template configuration with a 'sections' list
+        
+    Returns:
+        tuple: (compiled pattern, dict of group name -> section key)
+    """
+    alternatives = []
+    group_keys = {}
+    for i, section in enumerate(template['sections']):
+        group = f's{i}'
+        alternatives.append(rf"(?P<{group}>{section['number']}\.\s*{re.escape(section['key'])})")
+        group_keys[group] = section['key']
+    
+    pattern = re.compile(
+        rf"^[ \t#>*_]*(?:{'|'.join(alternatives)})[ \t:]*(?:\*\*|__)?[:\s]*",
+        re.IGNORECASE | re.MULTILINE
+    )
+    return pattern, group_keys
+
+
+@lru_cache(maxsize=32)
+def _parse_sections_cached(analysis_text, template_type):
+    """
+    Parse sections for parse_analysis_sections (cleared by load_templates).
+    
+    Returns:
+        tuple: (section key, content) pairs, immutable so cached results
+            can't be changed by callers
+    """
+    # Get template configuration
+    if template_type not in DOCUMENT_TEMPLATES:
+        template_type = 'generic'
+    template = DOCUMENT_TEMPLATES.get(template_type)
+    compiled = SECTION_PATTERNS.get(template_type)
+    if not template or compiled is None:
+        logger.warning(f"Template '{template_type}' not found, using basic parsing")
+        return (('Overview', analysis_text),)
+    
+    sections = {section['key']: '' for section in template['sections']}
+    
+    # Locate every section header in one pass; each section runs until the
+    # next header (the first occurrence of a section wins)
+    pattern, group_keys = compiled
+    headers = list(pattern.finditer(analysis_text))
+    for i, header in enumerate(headers):
+        section_key = group_keys[header.lastgroup]
+        if sections[section_key]:
+            continue
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(analysis_text)
+        sections[section_key] = analysis_text[header.end():end].strip()
+    
+    # If no sections were parsed, use the full text in the first section
+    if not any(sections.values()):
+        first_section_key = template['sections'][0]['key']
+        sections[first_section_key] = analysis_text
+    
+    return tuple(sections.items())
+
 
 def load_templates():
     """Load document templates from JSON file."""
-    global DOCUMENT_TEMPLATES
+    global DOCUMENT_TEMPLATES, SECTION_PATTERNS
     try:
         template_path = Config.DOCUMENT_TEMPLATES_PATH
         if os.path.exists(template_path):
@@ -44,6 +140,16 @@ def load_templates():
     except Exception as e:
         logger.error(f"Error loading document templates: {e}")
         DOCUMENT_TEMPLATES = {}
+    
+    SECTION_PATTERNS = {}
+    _parse_sections_cached.cache_clear()
+    for name, template in DOCUMENT_TEMPLATES.items():
+        if not template.get('sections'):
+            continue
+        try:
+            SECTION_PATTERNS[name] = _compile_section_pattern(template)
+        except (KeyError, TypeError, re.error) as e:
+            logger.error(f"Invalid sections in document template '{name}': {e}")
 
 # Load templates on module initialization
 load_templates()
@@ -60,39 +166,127 @@ def parse_analysis_sections(analysis_text, template_type='generic'):
     Returns:
         dict: Dictionary with section titles as keys and content as values
     """
-    # Get template configuration
-    template = DOCUMENT_TEMPLATES.get(template_type, DOCUMENT_TEMPLATES.get('generic'))
-    if not template:
-        logger.warning(f"Template '{template_type}' not found, using basic parsing")
-        return {'Overview': analysis_text}
+    # Results are memoized, so regenerating a report from the same
+    # response (e.g. with different branding) doesn't re-scan it
+    return dict(_parse_sections_cached(analysis_text, template_type))
+
+
+def _build_base_document():
+    """
+    Build the parts of a report that don't depend on its content or branding.
     
-    sections = {section['key']: '' for section in template['sections']}
+    Returns:
+        bytes: The serialized base .docx
+    """
+    doc = Document()
     
-    # Build regex patterns for each section
-    for i, section in enumerate(template['sections']):
-        section_num = section['number']
-        section_key = section['key']
-        
-        # Look for next section or end of text
-        if i < len(template['sections']) - 1:
-            next_section_num = template['sections'][i + 1]['number']
-            pattern = rf'{section_num}\.\s*{re.escape(section_key)}[:\s]*(.*?)(?={next_section_num}\.|$)'
-        else:
-            pattern = rf'{section_num}\.\s*{re.escape(section_key)}[:\s]*(.*?)$'
+    # Set default font to Calibri
+    font = doc.styles['Normal'].font
+    font.name = 'Calibri'
+    font.size = Pt(11)
+    
+    # Add footer with page numbers
+    footer_para = doc.sections[0].footer.paragraphs[0]
+    footer_para.text = 'Page '
+    footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    footer_run = footer_para.runs[0]
+    footer_run.font.size = Pt(9)
+    footer_run.font.color.rgb = RGBColor(128, 128, 128)
+    
+    # Add page number field
+    run = footer_para.add_run()
+    fldChar1 = OxmlElement('w:fldChar')
+    fldChar1.set(qn('w:fldCharType'), 'begin')
+    
+    instrText = OxmlElement('w:instrText')
+    instrText.set(qn('xml:space'), 'preserve')
+    instrText.text = 'PAGE'
+    
+    fldChar2 = OxmlElement('w:fldChar')
+    fldChar2.set(qn('w:fldCharType'), 'end')
+    
+    run._r.append(fldChar1)
+    run._r.append(instrText)
+    run._r.append(fldChar2)
+    
+    footer_para.add_run(' | Confidential')
+    
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _new_report_document():
+    """Open a fresh Document from the cached base report."""
+    global _base_document_bytes
+    if _base_document_bytes is None:
+        with _base_document_lock:
+            if _base_document_bytes is None:
+                _base_document_bytes = _build_base_document()
+    return Document(io.BytesIO(_base_document_bytes))
+
+
+def _make_paragraph(text, style_id=None):
+    """
+    Build a raw <w:p> element holding one run of text.
+    
+    Args:
+        text (str): Paragraph text
+        style_id (str): Optional paragraph style ID (e.g. 'ListBullet')
         
-        match = re.search(pattern, analysis_text, re.DOTALL | re.IGNORECASE)
-        if match:
-            sections[section_key] = match.group(1).strip()
+    Returns:
+        The <w:p> element
+    """
+    p = OxmlElement('w:p')
+    if style_id:
+        pPr = OxmlElement('w:pPr')
+        pStyle = OxmlElement('w:pStyle')
+        pStyle.set(qn('w:val'), style_id)
+        pPr.append(pStyle)
+        p.append(pPr)
     
-    # If no sections were parsed, use the full text in the first section
-    if not any(sections.values()):
-        first_section_key = template['sections'][0]['key']
-        sections[first_section_key] = analysis_text
+    r = OxmlElement('w:r')
+    t = OxmlElement('w:t')
+    t.set(qn('xml:space'), 'preserve')
+    t.text = text
+    r.append(t)
+    p.append(r)
+    return p
+
+
+def _append_list_content(doc, content):
+    """
+    Add a section's lines as bullet, numbered or plain paragraphs.
+    
+    The paragraphs are built as raw elements and inserted into the body in
+    one slice assignment (before the closing sectPr, where add_paragraph
+    would put them) instead of one add_paragraph call per line.
+    
+    Args:
+        doc: python-docx Document
+        content (str): Section text with one item per line
+    """
+    bullet_style = doc.styles['List Bullet'].style_id
+    number_style = doc.styles['List Number'].style_id
     
-    return sections
+    paragraphs = []
+    for line in content.split('\n'):
+        line = line.strip()
+        if line:
+            if line.startswith(('-', '•')):
+                paragraphs.append(_make_paragraph(line[1:].strip(), bullet_style))
+            elif numbered := _NUMBERED_PREFIX.match(line):
+                paragraphs.append(_make_paragraph(line[numbered.end():], number_style))
+            else:
+                paragraphs.append(_make_paragraph(line))
+    
+    body = doc.element.body
+    sectPr = body.find(qn('w:sectPr'))
+    index = body.index(sectPr) if sectPr is not None else len(body)
+    body[index:index] = paragraphs
 
 
-def create_process_document(analysis_text, process_name='Process Analysis', metadata=None, template_type=None):
+def create_process_document(analysis_text, process_name='Process Analysis', metadata=None, template_type=None, overrides=None, sections=None):
     """
     Generate Process Analysis Word document.
     
@@ -107,17 +301,24 @@ def create_process_document(analysis_text, process_name='Process Analysis', meta
         process_name (str): Name of the process being analyzed
         metadata (dict): Optional metadata (timestamp, query, user)
         template_type (str): Template type (sox_audit, mlops_workflow, devops_pipeline, generic)
+        overrides (dict): Optional branding overrides (project_name, company_name,
+            brand_color, logo_path); missing keys fall back to the session
+            settings of the current context, then Config
+        sections (dict): Optional sections already parsed from analysis_text
+            with parse_analysis_sections (skips parsing it again)
         
     Returns:
         str: Filename of the generated document
     """
     try:
+        overrides = overrides or {}
+        
         # Create generated_reports directory if it doesn't exist
         os.makedirs('generated_reports', exist_ok=True)
         
         # Determine template type
         if template_type is None:
-            template_type = Config.DEFAULT_TEMPLATE_TYPE
+            template_type = Config.effective('default_template')
         
         # Get template configuration
         template = DOCUMENT_TEMPLATES.get(template_type, DOCUMENT_TEMPLATES.get('generic'))
@@ -130,21 +331,17 @@ def create_process_document(analysis_text, process_name='Process Analysis', meta
             })
         
         # Parse sections from the analysis text
-        sections = parse_analysis_sections(analysis_text, template_type)
+        if sections is None:
+            sections = parse_analysis_sections(analysis_text, template_type)
         
-        # Create new document
-        doc = Document()
-        
-        # Set default font to Calibri
-        style = doc.styles['Normal']
-        font = style.font
-        font.name = 'Calibri'
-        font.size = Pt(11)
+        # Create new document (styles and footer come from the base report)
+        doc = _new_report_document()
         
         # Get branding configuration
-        project_name = Config.PROJECT_NAME
-        company_name = Config.COMPANY_NAME
-        brand_rgb = Config.get_brand_color_rgb()
+        project_name = overrides.get('project_name', Config.effective('project_name'))
+        company_name = overrides.get('company_name', Config.effective('company_name'))
+        brand_rgb = Config.get_brand_color_rgb(overrides.get('brand_color'))
+        logo_path = overrides.get('logo_path', Config.effective('logo_path'))
         
         # Add header with project branding
         header_section = doc.sections[0]
@@ -160,10 +357,10 @@ def create_process_document(analysis_text, process_name='Process Analysis', meta
         header_run.font.color.rgb = RGBColor(*brand_rgb)
         
         # Add logo if configured
-        if Config.DOCUMENT_LOGO_PATH and os.path.exists(Config.DOCUMENT_LOGO_PATH):
+        if logo_path and os.path.exists(logo_path):
             try:
                 header_para.add_run()
-                header_para.add_run().add_picture(Config.DOCUMENT_LOGO_PATH, width=Inches(0.5))
+                header_para.add_run().add_picture(logo_path, width=Inches(0.5))
             except Exception as e:
                 logger.warning(f"Could not add logo to document: {e}")
         
@@ -218,18 +415,9 @@ def create_process_document(analysis_text, process_name='Process Analysis', meta
             content = sections.get(section_key, '').strip()
             if content:
                 # Check if content has bullet points or numbered lists
-                if '\n-' in content or '\n•' in content or re.search(r'\n\d+\.', content):
+                if '\n-' in content or '\n•' in content or _NUMBERED_LINE.search(content):
                     # Split into lines and add as list items
-                    lines = content.split('\n')
-                    for line in lines:
-                        line = line.strip()
-                        if line:
-                            if line.startswith('-') or line.startswith('•'):
-                                doc.add_paragraph(line[1:].strip(), style='List Bullet')
-                            elif re.match(r'^\d+\.', line):
-                                doc.add_paragraph(re.sub(r'^\d+\.\s*', '', line), style='List Number')
-                            else:
-                                doc.add_paragraph(line)
+                    _append_list_content(doc, content)
                 else:
                     doc.add_paragraph(content)
             else:
@@ -237,40 +425,9 @@ def create_process_document(analysis_text, process_name='Process Analysis', meta
             
             doc.add_paragraph()  # Spacing between sections
         
-        # Add footer with page numbers
-        footer_section = doc.sections[0]
-        footer = footer_section.footer
-        footer_para = footer.paragraphs[0]
-        footer_para.text = 'Page '
-        footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        footer_run = footer_para.runs[0]
-        footer_run.font.size = Pt(9)
-        footer_run.font.color.rgb = RGBColor(128, 128, 128)
-        
-        # Add page number field
-        from docx.oxml import OxmlElement
-        from docx.oxml.ns import qn
-        
-        run = footer_para.add_run()
-        fldChar1 = OxmlElement('w:fldChar')
-        fldChar1.set(qn('w:fldCharType'), 'begin')
-        
-        instrText = OxmlElement('w:instrText')
-        instrText.set(qn('xml:space'), 'preserve')
-        instrText.text = 'PAGE'
-        
-        fldChar2 = OxmlElement('w:fldChar')
-        fldChar2.set(qn('w:fldCharType'), 'end')
-        
-        run._r.append(fldChar1)
-        run._r.append(instrText)
-        run._r.append(fldChar2)
-        
-        footer_para.add_run(' | Confidential')
-        
         # Generate filename
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        safe_process_name = re.sub(r'[^\w\s-]', '', process_name).strip().replace(' ', '_')
+        safe_process_name = _safe_filename_part(process_name)
         filename = f'Process_Analysis_{safe_process_name}_{timestamp}.docx'
         filepath = os.path.join('generated_reports', filename)
         
@@ -285,37 +442,13 @@ def create_process_document(analysis_text, process_name='Process Analysis', meta
         raise
 
 
-def list_generated_reports():
-    """
-    List all generated Word documents in the generated_reports folder.
-    
-    Returns:
-        list: List of dictionaries with file information
-    """
-    try:
-        reports_dir = 'generated_reports'
-        if not os.path.exists(reports_dir):
-            return []
-        
-        files = []
-        for filename in os.listdir(reports_dir):
-            if filename.endswith('.docx'):
-                filepath = os.path.join(reports_dir, filename)
-                stat = os.stat(filepath)
-                files.append({
-                    'filename': filename,
-                    'size': stat.st_size,
-                    'created': datetime.fromtimestamp(stat.st_ctime).strftime('%Y-%m-%d %H:%M:%S'),
-                    'modified': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-                })
-        
-        # Sort by modified time, newest first
-        files.sort(key=lambda x: x['modified'], reverse=True)
-        return files
-        
-    except Exception as e:
-        logger.error(f"Error listing generated reports: {e}")
-        return []
+def _safe_filename_part(name):
+    """Strip unsafe characters from a name and join its words with '_'."""
+    if name.isascii():
+        name = name.translate(_UNSAFE_ASCII_TABLE)
+    else:
+        name = _UNSAFE_FILENAME_CHARS.sub('', name)
+    return name.strip().replace(' ', '_')
 
 
 def cleanup_old_reports(hours=24):
@@ -330,25 +463,27 @@ def cleanup_old_reports(hours=24):
     """
     try:
         reports_dir = 'generated_reports'
-        if not os.path.exists(reports_dir):
-            return 0
-        
         deleted_count = 0
-        current_time = datetime.now().timestamp()
-        cutoff_time = current_time - (hours * 3600)
-        
-        for filename in os.listdir(reports_dir):
-            if filename.endswith('.docx'):
-                filepath = os.path.join(reports_dir, filename)
-                file_time = os.path.getmtime(filepath)
-                
-                if file_time < cutoff_time:
-                    os.remove(filepath)
-                    deleted_count += 1
-                    logger.info(f"Deleted old report: {filename}")
+        cutoff_time = time.time() - (hours * 3600)
+        
+        with os.scandir(reports_dir) as it:
+            for entry in it:
+                if not entry.name.endswith('.docx') or not entry.is_file():
+                    continue
+                if entry.stat().st_mtime >= cutoff_time:
+                    continue
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    # Already removed by a concurrent cleanup
+                    continue
+                deleted_count += 1
+                logger.info(f"Deleted old report: {entry.name}")
         
         return deleted_count
         
+    except FileNotFoundError:
+        return 0
     except Exception as e:
         logger.error(f"Error cleaning up old reports: {e}")
         return 0